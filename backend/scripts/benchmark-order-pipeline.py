@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Extract → Match → Export Pipeline
+
+Generates synthetic Persian order exports (duplicate customers, missing phones;
+see fake-woocommerce-server.py) at several sizes and measures each pipeline stage:
+- load_orders_from_json / load_name_index_from_json
+- search_orders_by_name (API path, against an in-process fake WooCommerce server)
+- match_phone_numbers (JSON name index first, API fallback)
+- write_results (json, xlsx, html)
+- parse-snapppay-orders.py export (all formats in one pass)
+
+Every (stage, size) runs in a fresh subprocess so peak RSS is per stage. Reported:
+wall time, throughput, RSS before the stage and peak RSS, and Python heap
+allocations traced with tracemalloc (peak and net retained, in a second pass).
+Results are written as JSON so runs can be compared (by default to
+benchmark-results.json in the work dir, so nothing lands in the source tree).
+
+Usage:
+    python benchmark-order-pipeline.py [--sizes 1000,10000,100000,1000000] [--stages a,b]
+        [--search-sample 50] [--phone-ratio 0.6] [--timeout 3600] [--no-allocations]
+        [--work-dir DIR] [--output FILE]
+"""
+
+import gc
+import io
+import json
+import sys
+import time
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+import importlib.util
+import threading
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:
+    HAS_RESOURCE = False
+
+SCRIPT_DIR = Path(__file__).parent
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+START_DATE = '2025-11-27T00:00:00'
+END_DATE = '2100-01-01T00:00:00'
+# Client rate limit against the local fake server (high enough not to throttle)
+BENCHMARK_RATE = 10000.0
+
+def load_script(file_name: str, module_name: str):
+    """Import one of the hyphenated scripts in this directory as a module"""
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPT_DIR / file_name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def get_cli_option(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Read `--name value` or `--name=value` from the command line"""
+    args = sys.argv[1:]
+    for idx, arg in enumerate(args):
+        if arg == name and idx + 1 < len(args):
+            return args[idx + 1]
+        if arg.startswith(name + '='):
+            return arg.split('=', 1)[1]
+    return default
+
+def current_rss_mb() -> float:
+    """Resident set size of this process right now"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+    except (OSError, NameError):
+        return peak_rss_mb()
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    if not HAS_RESOURCE:
+        return 0.0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+
+def to_export_record(order: Dict) -> Dict:
+    """Convert a WooCommerce API order into the SnappPay JSON export format"""
+    meta = {meta['key']: meta['value'] for meta in order.get('meta_data', [])}
+    billing = order.get('billing', {})
+    return {
+        'orderId': order['id'],
+        'orderDate': order['date_created'],
+        'guessedUserName': f"{billing.get('first_name', '')} {billing.get('last_name', '')}".strip(),
+        'snappPayToken': meta.get('_order_spp_token', ''),
+        'transactionId': meta.get('_transactionId', ''),
+        'billing': billing,
+        'shipping': order.get('shipping', {}),
+        'total': order.get('total', ''),
+        'status': order.get('status', ''),
+        'payment_method': order.get('payment_method', ''),
+        'payment_method_title': order.get('payment_method_title', ''),
+    }
+
+def write_json_array(output_file: Path, items: Iterable[Dict]) -> int:
+    """Write items as a JSON array one element at a time; returns the item count"""
+    count = 0
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for item in items:
+            f.write((',\n' if count else '\n') + json.dumps(item, ensure_ascii=False))
+            count += 1
+        f.write('\n]\n')
+    return count
+
+def prepare_dataset(data_dir: Path, size: int, phone_ratio: float) -> Dict:
+    """
+    Generate the inputs for one size (skipped if already present in data_dir):
+    - export.json: SnappPay JSON export with every order
+    - orders-without-phones.json: SnappPay orders without a phone, in API format
+    """
+    fake_server = load_script('fake-woocommerce-server.py', 'fake_woocommerce_server')
+    data_dir.mkdir(parents=True, exist_ok=True)
+    export_file = data_dir / 'export.json'
+    without_phone_file = data_dir / 'orders-without-phones.json'
+    info_file = data_dir / 'dataset.json'
+
+    if info_file.exists():
+        with open(info_file, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        if info.get('size') == size and info.get('phone_ratio') == phone_ratio:
+            return info
+
+    write_json_array(export_file, (
+        to_export_record(order) for order in fake_server.iter_generated_orders(size, phone_ratio)
+    ))
+    without_phone_count = write_json_array(without_phone_file, (
+        order for order in fake_server.iter_generated_orders(size, phone_ratio)
+        if order['payment_method'] == fake_server.SNAPPPAY_METHOD and not order['billing']['phone']
+    ))
+
+    info = {'size': size, 'phone_ratio': phone_ratio, 'orders_without_phone': without_phone_count}
+    with open(info_file, 'w', encoding='utf-8') as f:
+        json.dump(info, f)
+    return info
+
+def make_result_rows(orders: List[Dict], extractor) -> List[Dict]:
+    """Build guessed result rows (same shape as match_phone_numbers output) for the writer stages"""
+    confidences = ['high', 'medium', 'low']
+    rows = []
+    for idx, order in enumerate(orders):
+        billing = order.get('billing', {})
+        rows.append({
+            'order_id': order.get('id'),
+            'order_date': order.get('date_created'),
+            'user_name': extractor.get_user_name(order),
+            'snapppay_token': extractor.extract_snapppay_token(order) or '',
+            'transaction_id': extractor.extract_transaction_id(order) or '',
+            'guessed_phone': f"0912{idx:07d}",
+            'match_confidence': confidences[idx % 3],
+            'matching_orders_count': idx % 5 + 1,
+            'unique_phone_count': idx % 2 + 1,
+            'name_similarity': 1.0,
+            'billing': {key: billing.get(key, '') for key in ('first_name', 'last_name', 'phone', 'email', 'city')},
+            'shipping': {key: order.get('shipping', {}).get(key, '') for key in ('first_name', 'last_name', 'city')},
+            'total': order.get('total', ''),
+            'status': order.get('status', ''),
+        })
+    return rows
+
+# Stage setups prepare their inputs (not measured) and return (run, item_count)
+
+def start_fake_server(orders: List[Dict]) -> tuple:
+    """Start an in-process fake WooCommerce server; returns (server, base_url)"""
+    fake_server = load_script('fake-woocommerce-server.py', 'fake_woocommerce_server')
+    server = fake_server.make_server(fake_server.OrderStore(orders), 0, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def read_json(json_file: Path):
+    with open(json_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def setup_load_orders(ctx: Dict) -> tuple:
+    extractor = ctx['extractor']
+    return (lambda: extractor.load_orders_from_json(ctx['export_file'])), ctx['size']
+
+def setup_load_name_index(ctx: Dict) -> tuple:
+    extractor = ctx['extractor']
+    return (lambda: extractor.load_name_index_from_json(ctx['export_file'])), ctx['size']
+
+def setup_search_by_name(ctx: Dict) -> tuple:
+    extractor = ctx['extractor']
+    fake_server = load_script('fake-woocommerce-server.py', 'fake_woocommerce_server')
+    orders = fake_server.generate_orders(ctx['size'], ctx['phone_ratio'])
+    names = list(dict.fromkeys(extractor.get_user_name(order) for order in orders))[:ctx['search_sample']]
+    server, base_url = start_fake_server(orders)
+    client = extractor.WooCommerceClient(base_url, 'ck_benchmark', 'cs_benchmark', requests_per_second=BENCHMARK_RATE)
+
+    def run():
+        for name in names:
+            extractor.search_orders_by_name([client], name, START_DATE, END_DATE)
+
+    return run, len(names)
+
+def setup_match_phone_numbers(ctx: Dict) -> tuple:
+    extractor = ctx['extractor']
+    name_index, _ = extractor.load_name_index_from_json(ctx['export_file'])
+    orders_without_phone = read_json(ctx['without_phone_file'])
+    # Names the index can't answer fall back to an (empty) local API, so no network time is measured
+    server, base_url = start_fake_server([])
+    client = extractor.WooCommerceClient(base_url, 'ck_benchmark', 'cs_benchmark', requests_per_second=BENCHMARK_RATE)
+
+    def run():
+        extractor.match_phone_numbers([client], orders_without_phone, START_DATE, END_DATE, None, None, name_index)
+
+    return run, len(orders_without_phone)
+
+def make_write_results_setup(format_type: str) -> Callable[[Dict], tuple]:
+    def setup(ctx: Dict) -> tuple:
+        extractor = ctx['extractor']
+        if format_type == 'xlsx' and not extractor.HAS_OPENPYXL:
+            raise RuntimeError('openpyxl not installed')
+        rows = make_result_rows(read_json(ctx['without_phone_file']), extractor)
+        output_file = ctx['output_dir'] / f"guessed-orders-with-phones.{format_type}"
+        return (lambda: extractor.write_results(output_file, rows, format_type)), len(rows)
+    return setup
+
+def setup_parse_export(ctx: Dict) -> tuple:
+    parser = load_script('parse-snapppay-orders.py', 'parse_snapppay_orders')
+    formats = [fmt for fmt in parser.OUTPUT_FORMATS if fmt != 'xlsx' or parser.HAS_OPENPYXL]
+    return (lambda: parser.export_orders(ctx['export_file'], ctx['output_dir'], formats)), ctx['size']
+
+STAGES = {
+    'load_orders_from_json': setup_load_orders,
+    'load_name_index_from_json': setup_load_name_index,
+    'search_orders_by_name': setup_search_by_name,
+    'match_phone_numbers': setup_match_phone_numbers,
+    'write_results_json': make_write_results_setup('json'),
+    'write_results_xlsx': make_write_results_setup('xlsx'),
+    'write_results_html': make_write_results_setup('html'),
+    'parse_export_all_formats': setup_parse_export,
+}
+
+def run_stage(stage: str, data_dir: Path, size: int, phone_ratio: float, search_sample: int,
+              track_allocations: bool) -> Dict:
+    """Run one stage in this process and measure it (called in the benchmark subprocess)"""
+    ctx = {
+        'extractor': load_script('extract-and-match-orders.py', 'extract_and_match_orders'),
+        'export_file': data_dir / 'export.json',
+        'without_phone_file': data_dir / 'orders-without-phones.json',
+        'output_dir': Path(tempfile.mkdtemp(prefix=f"{stage}-", dir=data_dir)),
+        'size': size,
+        'phone_ratio': phone_ratio,
+        'search_sample': search_sample,
+    }
+
+    with redirect_stdout(io.StringIO()):
+        run, items = STAGES[stage](ctx)
+    gc.collect()
+    baseline_rss = current_rss_mb()
+
+    with redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - started
+    result = {
+        'seconds': round(seconds, 4),
+        'items': items,
+        'items_per_second': round(items / seconds, 1) if seconds else None,
+        'baseline_rss_mb': round(baseline_rss, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+    if track_allocations:
+        # Second pass under tracemalloc (much slower, so kept out of the timing above)
+        with redirect_stdout(io.StringIO()):
+            run, _ = STAGES[stage](ctx)
+            gc.collect()
+            tracemalloc.start()
+            run()
+            net_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        result['traced_peak_mb'] = round(peak_bytes / (1024 * 1024), 2)
+        result['traced_net_mb'] = round(net_bytes / (1024 * 1024), 2)
+    return result
+
+def run_stage_subprocess(stage: str, data_dir: Path, size: int, phone_ratio: float, search_sample: int,
+                         track_allocations: bool, timeout: float) -> Dict:
+    """Run one stage in a fresh interpreter so its peak RSS is isolated"""
+    command = [sys.executable, str(Path(__file__).resolve()), '--run-stage', stage, '--data-dir', str(data_dir),
+               '--size', str(size), '--phone-ratio', str(phone_ratio), '--search-sample', str(search_sample)]
+    if not track_allocations:
+        command.append('--no-allocations')
+
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {'error': f"timed out after {timeout:.0f}s"}
+
+    if completed.returncode != 0:
+        error_lines = (completed.stderr or '').strip().splitlines()
+        detail = error_lines[-1] if error_lines else f"exit code {completed.returncode}"
+        if completed.returncode < 0:
+            detail = f"killed by signal {-completed.returncode} (out of memory?)"
+        return {'error': detail}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main():
+    # Subprocess mode: measure one stage and print its result as JSON
+    if '--run-stage' in sys.argv:
+        try:
+            result = run_stage(get_cli_option('--run-stage'), Path(get_cli_option('--data-dir')),
+                               int(get_cli_option('--size')), float(get_cli_option('--phone-ratio', '0.6')),
+                               int(get_cli_option('--search-sample', '50')), '--no-allocations' not in sys.argv)
+        except Exception as e:
+            result = {'error': f"{type(e).__name__}: {e}"}
+        print(json.dumps(result))
+        return
+
+    sizes = [int(size) for size in get_cli_option('--sizes', ','.join(map(str, DEFAULT_SIZES))).split(',')]
+    stages = get_cli_option('--stages', ','.join(STAGES)).split(',')
+    unknown_stages = [stage for stage in stages if stage not in STAGES]
+    if unknown_stages:
+        print(f"❌ Error: Unknown stage(s): {', '.join(unknown_stages)}")
+        print(f"   Available: {', '.join(STAGES)}")
+        sys.exit(1)
+    phone_ratio = float(get_cli_option('--phone-ratio', '0.6'))
+    search_sample = int(get_cli_option('--search-sample', '50'))
+    timeout = float(get_cli_option('--timeout', '3600'))
+    track_allocations = '--no-allocations' not in sys.argv
+    work_dir = Path(get_cli_option('--work-dir', str(Path(tempfile.gettempdir()) / 'order-pipeline-benchmark')))
+    output_file = Path(get_cli_option('--output', str(work_dir / 'benchmark-results.json')))
+
+    print("🚀 Order pipeline benchmark")
+    print("=" * 60)
+    print(f"📏 Sizes: {', '.join(f'{size:,}' for size in sizes)}")
+    print(f"🧪 Stages: {', '.join(stages)}")
+    print(f"📂 Work dir: {work_dir}")
+    print(f"📄 Results: {output_file}")
+    print()
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'phone_ratio': phone_ratio,
+        'search_sample': search_sample,
+        'results': [],
+    }
+
+    try:
+        for size in sizes:
+            data_dir = work_dir / f"orders-{size}"
+            print(f"📦 Preparing {size:,} orders...", end=' ', flush=True)
+            started = time.perf_counter()
+            dataset = prepare_dataset(data_dir, size, phone_ratio)
+            print(f"done in {time.perf_counter() - started:.1f}s ({dataset['orders_without_phone']:,} without phone)")
+
+            for stage in stages:
+                print(f"   ⏱️  {stage}...", end=' ', flush=True)
+                result = run_stage_subprocess(stage, data_dir, size, phone_ratio, search_sample, track_allocations,
+                                              timeout)
+                report['results'].append({'stage': stage, 'size': size, **result})
+
+                if 'error' in result:
+                    print(f"❌ {result['error']}")
+                else:
+                    allocation_note = f", traced peak {result['traced_peak_mb']}MB" if 'traced_peak_mb' in result else ''
+                    print(f"✅ {result['seconds']:.2f}s ({result['items_per_second']:,} items/s), "
+                          f"peak RSS {result['peak_rss_mb']}MB{allocation_note}")
+            print()
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Interrupted by user (writing partial results)")
+
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✅ Written {len(report['results'])} measurements to: {output_file}")
+
+if __name__ == '__main__':
+    main()
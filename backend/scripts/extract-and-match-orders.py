@@ -8,62 +8,496 @@ This script:
 3. Creates a guessed orders result matching names to phone numbers
 """
 
+import os
 import json
 import sys
 import time
-import base64
+import random
+import sqlite3
+import threading
+import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import chain
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterable, Iterator, List, Dict, Optional
+from urllib.parse import urlparse
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from order_io import CsvSink, JsonLinesSink, embed_json, iter_json_records
 
 # Try to import optional libraries
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
 try:
     from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.formatting.rule import FormulaRule
     from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
     from openpyxl.utils import get_column_letter
     HAS_OPENPYXL = True
 except ImportError:
     HAS_OPENPYXL = False
 
+# Order fields read by extraction and name matching (requested via _fields to shrink responses)
+ORDER_FIELDS = ['id', 'date_created', 'date_modified', 'billing', 'shipping', 'payment_method', 'meta_data',
+                'total', 'status']
+
+# Order fields downloaded by --prefetch: just enough for the snapshot's name and phone columns
+SNAPSHOT_FIELDS = ['id', 'date_created', 'date_modified', 'billing', 'shipping']
+
+# Flat columns of the streamed CSV results (see flatten_result)
+RESULT_CSV_FIELDS = ['order_id', 'order_date', 'user_name', 'guessed_phone', 'snapppay_token', 'transaction_id',
+                     'match_confidence', 'matching_orders_count', 'unique_phone_count', 'name_similarity',
+                     'billing_city', 'total', 'status', 'phone_fanout', 'shared_phone']
+
+# Order statuses extracted in Step 1
+EXTRACT_STATUSES = ('processing', 'completed')
+
+# Match confidence tiers, lowest first
+CONFIDENCE_LEVELS = ['low', 'medium', 'high']
+
+# Guessed phones seen with more than this many different names (family or courier numbers) are flagged
+# as shared and their results drop one confidence tier
+PHONE_FANOUT_THRESHOLD = 2
+
+# Below this many names, scoring them one by one is faster than building NumPy arrays
+SCORE_BATCH_MIN_SIZE = 64
+
+# Name search cache expiry (seconds): found phones are kept longer than "no match" results
+CACHE_TTL = 30 * 24 * 3600
+NEGATIVE_CACHE_TTL = 24 * 3600
+
+# Run metrics: Prometheus name prefix and request duration histogram buckets (seconds)
+METRICS_PREFIX = 'snapppay_matcher_'
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class Metrics:
+    """
+    Thread-safe in-process metrics registry for one run
+
+    Counters and histograms are keyed by name plus a sorted label tuple; stage
+    timers record wall-clock seconds per pipeline stage. At the end of a run the
+    registry is written as a JSON summary and, optionally, in the Prometheus text
+    exposition format (for node_exporter's textfile collector).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._stages = {}
+        self.started_at = time.time()
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, str]) -> tuple:
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'count': 0, 'sum': 0.0, 'buckets': [0] * len(DURATION_BUCKETS)}
+            histogram['count'] += 1
+            histogram['sum'] += value
+            for idx, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    histogram['buckets'][idx] += 1
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Time a pipeline stage (accumulates if the stage runs more than once)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._stages[stage] = self._stages.get(stage, 0.0) + elapsed
+
+    def counter_value(self, name: str, **labels) -> float:
+        """Sum of a counter across all label sets matching the given labels"""
+        wanted = {(key, str(value)) for key, value in labels.items()}
+        with self._lock:
+            return sum(value for (counter_name, counter_labels), value in self._counters.items()
+                       if counter_name == name and wanted <= set(counter_labels))
+
+    def summary(self) -> Dict:
+        """Structured snapshot of every metric"""
+        with self._lock:
+            counters = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                counters.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+            histograms = {}
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                histograms.setdefault(name, []).append({
+                    'labels': dict(labels),
+                    'count': histogram['count'],
+                    'sum': round(histogram['sum'], 4),
+                    'buckets': dict(zip(map(str, DURATION_BUCKETS), histogram['buckets'])),
+                })
+            stages = {stage: round(seconds, 3) for stage, seconds in self._stages.items()}
+        return {
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'duration_seconds': round(time.time() - self.started_at, 3),
+            'stages': stages,
+            'counters': counters,
+            'histograms': histograms,
+        }
+
+    @staticmethod
+    def _format_labels(labels: Dict[str, str]) -> str:
+        if not labels:
+            return ''
+
+        def escape(value: str) -> str:
+            return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+        return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels.items()) + '}'
+
+    def prometheus_text(self) -> str:
+        """Render the metrics in the Prometheus text exposition format"""
+        summary = self.summary()
+        lines = []
+
+        lines.append(f"# TYPE {METRICS_PREFIX}stage_duration_seconds gauge")
+        for stage, seconds in summary['stages'].items():
+            lines.append(f"{METRICS_PREFIX}stage_duration_seconds{self._format_labels({'stage': stage})} {seconds}")
+
+        for name, series in summary['counters'].items():
+            lines.append(f"# TYPE {METRICS_PREFIX}{name} counter")
+            for item in series:
+                lines.append(f"{METRICS_PREFIX}{name}{self._format_labels(item['labels'])} {item['value']}")
+
+        for name, series in summary['histograms'].items():
+            lines.append(f"# TYPE {METRICS_PREFIX}{name} histogram")
+            for item in series:
+                # Bucket counts are already cumulative (observe() counts into every bucket >= value)
+                for bound, count in item['buckets'].items():
+                    labels = self._format_labels({**item['labels'], 'le': bound})
+                    lines.append(f"{METRICS_PREFIX}{name}_bucket{labels} {count}")
+                labels = self._format_labels({**item['labels'], 'le': '+Inf'})
+                lines.append(f"{METRICS_PREFIX}{name}_bucket{labels} {item['count']}")
+                lines.append(f"{METRICS_PREFIX}{name}_sum{self._format_labels(item['labels'])} {item['sum']}")
+                lines.append(f"{METRICS_PREFIX}{name}_count{self._format_labels(item['labels'])} {item['count']}")
+
+        lines.append(f"# TYPE {METRICS_PREFIX}last_run_timestamp_seconds gauge")
+        lines.append(f"{METRICS_PREFIX}last_run_timestamp_seconds {int(time.time())}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, json_file: Optional[Path] = None, textfile: Optional[Path] = None):
+        """Write the JSON summary and/or Prometheus textfile (atomically, so scrapers never see half a file)"""
+        outputs = []
+        if json_file:
+            outputs.append((json_file, json.dumps(self.summary(), ensure_ascii=False, indent=2)))
+        if textfile:
+            outputs.append((textfile, self.prometheus_text()))
+        for path, content in outputs:
+            tmp_path = path.with_name(path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+# Metrics for this run (recorded by the API client, name cache, matcher and writers)
+METRICS = Metrics()
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delay in seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+class RateLimiter:
+    """
+    Thread-safe token bucket limiter for one WooCommerce source.
+
+    Refills at `rate` tokens per second up to `capacity`. The rate is adaptive:
+    it is halved when the server throttles us (HTTP 429) and creeps back up to
+    the configured maximum on successful responses.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[int] = None, min_rate: float = 0.5):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def slow_down(self, pause: float = 0.0):
+        """Halve the rate and hold all requests for `pause` seconds (e.g. from Retry-After)"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+
+    def speed_up(self):
+        """Recover the rate additively after a successful request"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+class ConnectCountingMixin:
+    """
+    Connection pool that counts TCP (and TLS) connects
+
+    urllib3's num_connections only counts new connection objects; a pooled
+    connection the server closed is silently reconnected. Checking the socket
+    when a connection leaves the pool counts every handshake.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.num_connects = 0
+        self._connects_lock = threading.Lock()
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        if getattr(conn, 'sock', None) is None:
+            with self._connects_lock:
+                self.num_connects += 1
+        return conn
+
+class ConnectCountingHTTPConnectionPool(ConnectCountingMixin, HTTPConnectionPool):
+    pass
+
+class ConnectCountingHTTPSConnectionPool(ConnectCountingMixin, HTTPSConnectionPool):
+    pass
+
+class PoolStatsHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools count connects for connection reuse stats"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': ConnectCountingHTTPConnectionPool,
+            'https': ConnectCountingHTTPSConnectionPool,
+        }
+
 class WooCommerceClient:
     """WooCommerce REST API Client"""
 
-    def __init__(self, base_url: str, consumer_key: str, consumer_secret: str):
+    # Responses worth retrying: throttling and transient server errors
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    # WooCommerce accepts at most 100 objects per batch request
+    BATCH_SIZE_LIMIT = 100
+
+    # How credentials are sent: Basic auth header, consumer_key/secret query params, or both
+    # (some servers block Basic Auth headers, others log query strings)
+    AUTH_MODES = ('both', 'basic', 'query')
+
+    def __init__(self, base_url: str, consumer_key: str, consumer_secret: str, max_concurrent_requests: int = 4,
+                 requests_per_second: float = 5.0, max_retries: int = 5, backoff_base: float = 1.0,
+                 backoff_max: float = 60.0, pool_size: Optional[int] = None, keep_alive: bool = True,
+                 auth_mode: str = 'both', timeout: float = 60.0):
+        if auth_mode not in self.AUTH_MODES:
+            raise ValueError(f"auth_mode must be one of {', '.join(self.AUTH_MODES)}, got {auth_mode!r}")
         self.base_url = base_url.rstrip('/')
+        # Metrics label for this source
+        self.source = urlparse(self.base_url).netloc or self.base_url
         self.auth = HTTPBasicAuth(consumer_key, consumer_secret)
+        self.auth_mode = auth_mode
+        self.timeout = timeout
+        # Per-source limit on in-flight requests when called from worker threads
+        self.max_concurrent_requests = max(1, max_concurrent_requests)
+        self._request_slots = threading.BoundedSemaphore(self.max_concurrent_requests)
+
         self.session = requests.Session()
-        self.session.auth = self.auth
+        if auth_mode != 'query':
+            self.session.auth = self.auth
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+        # One keep-alive pool per source, sized to the in-flight limit so concurrent workers reuse
+        # connections (and TLS sessions) instead of opening and discarding extra ones past the
+        # default 10. Retries are handled in _request, so the adapter itself never retries.
+        self.keep_alive = keep_alive
+        self.pool_size = max(1, pool_size or self.max_concurrent_requests)
+        adapter = PoolStatsHTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+        # Per-source request rate and retry policy
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Seconds to wait before the next attempt: Retry-After if given, else exponential backoff with full jitter"""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _downloaded_bytes(response: requests.Response) -> int:
+        """Bytes received on the wire (compressed size when gzip is used), falling back to the body length"""
+        body_length = len(response.content)
+        try:
+            return int(response.raw.tell()) or body_length
+        except (AttributeError, TypeError, ValueError):
+            return body_length
+
+    def _request(self, method: str, path: str, params: Optional[Dict] = None,
+                 json_body: Optional[Dict] = None) -> requests.Response:
+        """
+        Send a request to the WooCommerce REST API
 
-    def get_orders(self, params: Dict) -> tuple:
+        Throttled by the source's rate limiter; 429/5xx responses, timeouts and
+        connection errors are retried up to max_retries times. Every attempt is
+        recorded in METRICS (requests, duration, bytes, retries, errors) per source.
+        """
+        url = f"{self.base_url}/wp-json/wc/v3/{path}"
+
+        # Add auth as query params (some servers block Basic Auth headers)
+        params = dict(params or {})
+        if self.auth_mode != 'basic':
+            params['consumer_key'] = self.auth.username
+            params['consumer_secret'] = self.auth.password
+
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            try:
+                with self._request_slots:
+                    started = time.perf_counter()
+                    response = self.session.request(method, url, params=params, json=json_body,
+                                                    timeout=self.timeout)
+                    METRICS.observe('wc_request_duration_seconds', time.perf_counter() - started,
+                                    source=self.source, method=method)
+                METRICS.inc('wc_requests_total', source=self.source, method=method, status=response.status_code)
+                METRICS.inc('wc_downloaded_bytes_total', self._downloaded_bytes(response), source=self.source)
+
+                if response.status_code in self.RETRY_STATUS_CODES and attempt < self.max_retries:
+                    METRICS.inc('wc_retries_total', source=self.source, reason=response.status_code)
+                    delay = self._retry_delay(attempt, response)
+                    if response.status_code == 429:
+                        self.rate_limiter.slow_down(delay)
+                    attempt += 1
+                    print(f"   ⏳ HTTP {response.status_code}, retrying in {delay:.1f}s ({attempt}/{self.max_retries})")
+                    time.sleep(delay)
+                    continue
+
+                response.raise_for_status()
+                self.rate_limiter.speed_up()
+                return response
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                if attempt < self.max_retries:
+                    METRICS.inc('wc_retries_total', source=self.source, reason=type(e).__name__)
+                    delay = self._retry_delay(attempt)
+                    attempt += 1
+                    print(f"   ⏳ {type(e).__name__}, retrying in {delay:.1f}s ({attempt}/{self.max_retries})")
+                    time.sleep(delay)
+                    continue
+                METRICS.inc('wc_request_errors_total', source=self.source, error=type(e).__name__)
+                print(f"❌ API Error: {e}")
+                raise
+            except requests.exceptions.RequestException as e:
+                METRICS.inc('wc_request_errors_total', source=self.source, error=type(e).__name__)
+                print(f"❌ API Error: {e}")
+                if hasattr(e.response, 'text'):
+                    print(f"   Response: {e.response.text[:200]}")
+                raise
+
+    def get_orders(self, params: Dict, fields: Optional[List[str]] = None) -> tuple:
         """
         Fetch orders from WooCommerce API
 
+        When `fields` is given, only those top-level order fields are requested (`_fields`).
+
         Returns:
             (orders_list, total_pages, total_items)
         """
-        url = f"{self.base_url}/wp-json/wc/v3/orders"
-
-        # Add auth as query params (some servers block Basic Auth headers)
         params = params.copy()
-        params['consumer_key'] = self.auth.username
-        params['consumer_secret'] = self.auth.password
+        if fields:
+            params['_fields'] = ','.join(fields)
 
-        try:
-            response = self.session.get(url, params=params, timeout=60)
-            response.raise_for_status()
-
-            orders = response.json()
-            total_pages = int(response.headers.get('X-WP-TotalPages', 1))
-            total_items = int(response.headers.get('X-WP-Total', 0))
-
-            return orders, total_pages, total_items
-        except requests.exceptions.RequestException as e:
-            print(f"❌ API Error: {e}")
-            if hasattr(e.response, 'text'):
-                print(f"   Response: {e.response.text[:200]}")
-            raise
+        response = self._request('GET', 'orders', params)
+
+        orders = response.json()
+        total_pages = int(response.headers.get('X-WP-TotalPages', 1))
+        total_items = int(response.headers.get('X-WP-Total', 0))
+
+        return orders, total_pages, total_items
+
+    def batch_update_orders(self, updates: List[Dict]) -> List[Dict]:
+        """
+        Update several orders in one request through /orders/batch
+
+        Args:
+            updates: Order payloads, each with an 'id' (at most BATCH_SIZE_LIMIT)
+
+        Returns:
+            Per-order results; failed items carry an 'error' dict
+        """
+        response = self._request('POST', 'orders/batch', json_body={'update': updates})
+        return response.json().get('update', [])
+
+    def connection_stats(self) -> Dict:
+        """Connections opened vs requests sent through this source's connection pools"""
+        connections = requests_sent = 0
+        for adapter in {id(adapter): adapter for adapter in self.session.adapters.values()}.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    connections += getattr(pool, 'num_connects', pool.num_connections)
+                    requests_sent += pool.num_requests
+        return {
+            'source': self.source,
+            'pool_size': self.pool_size,
+            'keep_alive': self.keep_alive,
+            'connections_opened': connections,
+            'requests': requests_sent,
+            'connections_reused': max(0, requests_sent - connections),
+        }
+
+    def close(self) -> Dict:
+        """Record connection reuse in METRICS and close the session; returns the final connection stats"""
+        stats = self.connection_stats()
+        METRICS.inc('wc_connections_opened_total', stats['connections_opened'], source=self.source)
+        METRICS.inc('wc_connections_reused_total', stats['connections_reused'], source=self.source)
+        self.session.close()
+        return stats
 
 def extract_snapppay_token(order: Dict) -> Optional[str]:
     """Extract SnappPay token from order meta_data or stored JSON value"""
@@ -119,247 +553,1165 @@ def get_user_name(order: Dict) -> str:
 
     return 'نامشخص'
 
+# Arabic/Persian variants folded to one form; diacritics, tatweel and zero-width/bidi marks removed
+NAME_TRANSLATION = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ئ': 'ی',
+    'ك': 'ک',
+    'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'ٱ': 'ا',
+    'ؤ': 'و',
+    **{chr(0x06F0 + digit): str(digit) for digit in range(10)},  # Persian digits
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic-Indic digits
+    **{chr(code): None for code in range(0x064B, 0x0660)},  # Harakat, shadda, sukun, hamza marks
+    '\u0670': None,  # Superscript alef
+    '\u0640': None,  # Tatweel
+    '\u200c': None,  # ZWNJ
+    '\u200d': None,  # ZWJ
+    '\u200e': None,  # LRM
+    '\u200f': None,  # RLM
+    '\ufeff': None,  # BOM
+})
+
+def canonicalize_name(name: str) -> str:
+    """
+    Canonical matching key for a name
+
+    Folds Arabic/Persian letter variants (ي/ی, ك/ک, ...), Persian/Arabic digits,
+    diacritics, tatweel and ZWNJ with a single translate() pass, then collapses
+    whitespace and lowercases. Arabic presentation forms are NFKC-normalized first.
+    """
+    if name and max(name) >= '\ufb50':
+        name = unicodedata.normalize('NFKC', name)
+    return ' '.join(name.translate(NAME_TRANSLATION).split()).lower()
+
 def normalize_name(name: str) -> str:
-    """Normalize name for matching (remove extra spaces, convert to lowercase)"""
-    return ' '.join(name.split()).lower().strip()
+    """Normalize name for matching (canonical Persian form, single spaces, lowercase)"""
+    return canonicalize_name(name)
+
+def get_name_key(order: Dict) -> str:
+    """Get the order's canonical name key, computing it once and storing it on the order"""
+    if type(order) is OrderRecord:
+        return order.name_key
+    name_key = order.get('_name_key')
+    if name_key is None:
+        name_key = normalize_name(get_user_name(order))
+        order['_name_key'] = name_key
+    return name_key
+
+def filter_orders_without_phone(orders: List[Dict]) -> List[Dict]:
+    """Keep SnappPay orders that have no billing phone number"""
+    return [
+        order for order in orders
+        if order.get('payment_method') == 'WC_Gateway_SnappPay' and
+        (not order.get('billing', {}).get('phone') or
+         not order.get('billing', {}).get('phone', '').strip())
+    ]
 
-def extract_orders_without_phones(wc_client: WooCommerceClient, start_date: str, end_date: str) -> List[Dict]:
-    """Extract orders without phone numbers from WooCommerce API"""
-    print("🔍 Step 1: Extracting orders without phone numbers from WooCommerce API...")
-    print(f"   Date range: {start_date} to {end_date}")
-    print(f"   Status: processing, completed")
-    print(f"   Payment: WC_Gateway_SnappPay")
-    print()
+def fetch_order_pages(wc_client: WooCommerceClient, base_params: Dict, on_page: Callable[[List[Dict]], None],
+                      page_workers: int = 4, serial: bool = False, fields: List[str] = ORDER_FIELDS):
+    """
+    Walk every page of an /orders query and hand each page to on_page in page order
 
-    all_orders = []
+    Page 1 is fetched first to learn X-WP-TotalPages; the remaining pages are then
+    fetched concurrently by page_workers threads. Pass serial=True to walk the
+    pages one after another instead. Only `fields` are requested for each order.
+    """
     page = 1
     per_page = 100
+    total_pages = 1
+    parallel = not serial and page_workers > 1
+
+    def fetch_page(page_number: int) -> tuple:
+        params = dict(base_params, per_page=per_page, page=page_number)
+        return wc_client.get_orders(params, fields)
 
+    # Serial walk (in parallel mode this only fetches page 1)
     while True:
         print(f"📄 Fetching page {page}...", end=' ')
 
-        params = {
-            'after': start_date,
-            'before': end_date,
-            'payment_method': 'WC_Gateway_SnappPay',
-            'status': 'processing,completed',
-            'per_page': per_page,
-            'page': page,
-            'orderby': 'date',
-            'order': 'desc'
-        }
-
         try:
-            orders, total_pages, total_items = wc_client.get_orders(params)
+            orders, total_pages, total_items = fetch_page(page)
 
             if not orders:
                 print("No more orders")
+                total_pages = page
                 break
 
-            # Filter for orders without phone numbers
-            orders_without_phone = [
-                order for order in orders
-                if order.get('payment_method') == 'WC_Gateway_SnappPay' and
-                (not order.get('billing', {}).get('phone') or
-                 not order.get('billing', {}).get('phone', '').strip())
-            ]
-
-            all_orders.extend(orders_without_phone)
-            print(f"Found {len(orders)} orders, {len(orders_without_phone)} without phone numbers")
+            on_page(orders)
 
-            if page >= total_pages:
+            if page >= total_pages or parallel:
                 break
 
             page += 1
-            time.sleep(0.1)  # Reduced rate limiting
 
         except Exception as e:
+            # The client already retried transient failures; don't return a silently truncated result
             print(f"❌ Error: {e}")
-            break
+            raise
+
+    if parallel and page < total_pages:
+        print(f"   Fetching pages {page + 1}-{total_pages} with {page_workers} workers...")
+        with ThreadPoolExecutor(max_workers=page_workers) as executor:
+            futures = [executor.submit(fetch_page, page_number) for page_number in range(page + 1, total_pages + 1)]
+            try:
+                # Merge in page order so the result matches a serial walk
+                for page_number, future in enumerate(futures, page + 1):
+                    print(f"📄 Page {page_number}...", end=' ')
+                    try:
+                        orders, _, _ = future.result()
+                    except Exception as e:
+                        print(f"❌ Error: {e}")
+                        raise
+
+                    if not orders:
+                        print("No more orders")
+                        break
+
+                    on_page(orders)
+            finally:
+                # Don't fetch queued pages after an error, an empty page or Ctrl-C
+                for future in futures:
+                    future.cancel()
+
+def update_high_water_mark(high_water_mark: Optional[Dict], orders: List[Dict]):
+    """Advance the newest date_created/date_modified seen in place"""
+    if high_water_mark is None:
+        return
+    for order in orders:
+        for field in ('date_created', 'date_modified'):
+            value = order.get(field)
+            if value and value > (high_water_mark.get(field) or ''):
+                high_water_mark[field] = value
+
+def extract_orders_without_phones(wc_client: WooCommerceClient, start_date: str, end_date: str,
+                                  page_workers: int = 4, serial: bool = False,
+                                  high_water_mark: Dict = None) -> List[Dict]:
+    """
+    Extract orders without phone numbers from WooCommerce API
+
+    Pages after the first are fetched concurrently unless serial=True (see fetch_order_pages).
+    If high_water_mark is given it is advanced to the newest dates seen.
+    """
+    print("🔍 Step 1: Extracting orders without phone numbers from WooCommerce API...")
+    print(f"   Date range: {start_date} to {end_date}")
+    print(f"   Status: processing, completed")
+    print(f"   Payment: WC_Gateway_SnappPay")
+    print()
+
+    all_orders = []
+
+    def add_page(orders: List[Dict]):
+        update_high_water_mark(high_water_mark, orders)
+        # Filter for orders without phone numbers
+        orders_without_phone = filter_orders_without_phone(orders)
+        all_orders.extend(orders_without_phone)
+        print(f"Found {len(orders)} orders, {len(orders_without_phone)} without phone numbers")
+
+    params = {
+        'after': start_date,
+        'before': end_date,
+        'payment_method': 'WC_Gateway_SnappPay',
+        'status': ','.join(EXTRACT_STATUSES),
+        'orderby': 'date',
+        'order': 'desc'
+    }
+    fetch_order_pages(wc_client, params, add_page, page_workers, serial)
 
     print(f"\n✅ Total: {len(all_orders)} orders without phone numbers")
     return all_orders
 
-def load_orders_from_json(json_file: Path) -> List[Dict]:
-    """Load orders from JSON file for fast lookup"""
+def extract_changed_orders(wc_client: WooCommerceClient, modified_after: str, page_workers: int = 4,
+                           serial: bool = False, high_water_mark: Dict = None) -> List[Dict]:
+    """
+    Fetch SnappPay orders created or modified after the previous run's high-water mark
+
+    Unlike extract_orders_without_phones this keeps every status and orders that
+    now have a phone, so merge_changed_orders can drop them from the previous set.
+    """
+    print("🔍 Step 1: Extracting orders changed since the last run from WooCommerce API...")
+    print(f"   Modified after: {modified_after}")
+    print(f"   Payment: WC_Gateway_SnappPay")
+    print()
+
+    changed_orders = []
+
+    def add_page(orders: List[Dict]):
+        update_high_water_mark(high_water_mark, orders)
+        changed_orders.extend(orders)
+        print(f"Found {len(orders)} changed orders")
+
+    params = {
+        'modified_after': modified_after,
+        'payment_method': 'WC_Gateway_SnappPay',
+        'orderby': 'date',
+        'order': 'desc'
+    }
+    fetch_order_pages(wc_client, params, add_page, page_workers, serial)
+
+    print(f"\n✅ Total: {len(changed_orders)} changed orders")
+    return changed_orders
+
+def merge_changed_orders(previous_orders: List[Dict], changed_orders: List[Dict], start_date: str) -> List[Dict]:
+    """
+    Apply changed orders to the previous set of orders without phones
+
+    Changed orders replace their previous version if they are still phoneless,
+    in an extracted status and inside the date range; otherwise they are dropped.
+    The merged set is ordered newest first, like a full extraction.
+    """
+    merged = {order.get('id'): order for order in previous_orders}
+    for order in changed_orders:
+        merged.pop(order.get('id'), None)
+
+    for order in filter_orders_without_phone(changed_orders):
+        if order.get('status') in EXTRACT_STATUSES and (order.get('date_created') or '') >= start_date:
+            merged[order.get('id')] = order
+
+    return sorted(merged.values(), key=lambda order: order.get('date_created') or '', reverse=True)
+
+def load_extraction_state(state_file: Path, orders_file: Path) -> tuple:
+    """
+    Load the previous run's extraction state and its orders without phones
+
+    Returns:
+        (state_dict, orders_list) - both empty if there is no usable previous run
+    """
+    if not state_file.exists() or not orders_file.exists():
+        return {}, []
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        with open(orders_file, 'r', encoding='utf-8') as f:
+            orders = json.load(f)
+        return state, orders
+    except Exception as e:
+        print(f"⚠️  Could not load extraction state: {e}")
+        return {}, []
+
+def save_extraction_state(state_file: Path, orders_file: Path, state: Dict, orders: List[Dict]):
+    """Save the extraction state and the current orders without phones for the next incremental run"""
+    try:
+        with open(orders_file, 'w', encoding='utf-8') as f:
+            json.dump(orders, f, ensure_ascii=False)
+        with open(state_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"⚠️  Could not save extraction state: {e}")
+
+def intern_string(value):
+    """Intern strings so equal values from different orders share one object"""
+    return sys.intern(value) if type(value) is str else value
+
+class OrderRecord:
+    """
+    Compact order from the JSON export, used for the JSON name index
+
+    One __slots__ object per order instead of an order dict with nested billing
+    and shipping dicts. Names, phones, cities and statuses are interned, so the
+    orders of one customer share their strings. The phone is stored stripped
+    and the canonical name key is computed once. Matching reads the attributes
+    directly.
+    """
+
+    __slots__ = ('id', 'date_created', 'name_key', 'first_name', 'last_name', 'phone', 'email', 'city',
+                 'shipping_first_name', 'shipping_last_name', 'shipping_city', 'total', 'status')
+
+    def __init__(self, order_id, date_created, name_key: str, first_name: str, last_name: str, phone: str,
+                 email: str, city: str, shipping_first_name: str, shipping_last_name: str, shipping_city: str,
+                 total, status: str):
+        self.id = order_id
+        self.date_created = date_created
+        self.name_key = intern_string(name_key)
+        self.first_name = intern_string(first_name)
+        self.last_name = intern_string(last_name)
+        self.phone = intern_string(phone.strip())
+        self.email = email
+        self.city = intern_string(city)
+        self.shipping_first_name = intern_string(shipping_first_name)
+        self.shipping_last_name = intern_string(shipping_last_name)
+        self.shipping_city = intern_string(shipping_city)
+        self.total = total
+        self.status = intern_string(status)
+
+    @classmethod
+    def from_json_order(cls, order: Dict) -> 'OrderRecord':
+        """Build a record from an order of the JSON export"""
+        billing = order.get('billing', {})
+        shipping = order.get('shipping', {})
+        return cls(
+            order.get('orderId'),
+            order.get('orderDate'),
+            normalize_name(get_user_name(order)),
+            billing.get('first_name', ''),
+            billing.get('last_name', ''),
+            billing.get('phone', ''),
+            billing.get('email', ''),
+            billing.get('city', ''),
+            shipping.get('first_name', ''),
+            shipping.get('last_name', ''),
+            shipping.get('city', ''),
+            order.get('total', ''),
+            order.get('status', ''),
+        )
+
+def iter_order_records_from_json(json_file: Path) -> Iterator[OrderRecord]:
+    """Stream orders from the JSON (or JSON Lines) export one at a time as compact OrderRecords"""
+    for order in iter_json_records(json_file):
+        yield OrderRecord.from_json_order(order)
+
+def load_orders_from_json(json_file: Path) -> List[OrderRecord]:
+    """Load orders from JSON file for fast lookup (as compact OrderRecords)"""
     if not json_file.exists():
         return []
 
     try:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            orders = json.load(f)
-            # Convert to WooCommerce API format for compatibility
-            converted_orders = []
-            for order in orders:
-                # Convert to API format
-                converted_order = {
-                    'id': order.get('orderId'),
-                    'date_created': order.get('orderDate'),
-                    'billing': {
-                        'first_name': order.get('billing', {}).get('first_name', ''),
-                        'last_name': order.get('billing', {}).get('last_name', ''),
-                        'phone': order.get('billing', {}).get('phone', ''),
-                        'email': order.get('billing', {}).get('email', ''),
-                        'city': order.get('billing', {}).get('city', ''),
-                    },
-                    'shipping': {
-                        'first_name': order.get('shipping', {}).get('first_name', ''),
-                        'last_name': order.get('shipping', {}).get('last_name', ''),
-                        'city': order.get('shipping', {}).get('city', ''),
-                    },
-                    'total': order.get('total', ''),
-                    'status': order.get('status', ''),
-                }
-                converted_orders.append(converted_order)
-            return converted_orders
+        return list(iter_order_records_from_json(json_file))
     except Exception as e:
         print(f"⚠️  Could not load orders from JSON: {e}")
         return []
 
-def search_orders_by_name(wc_clients: List[WooCommerceClient], name: str, start_date: str, end_date: str,
-                          cache: Dict = None, json_orders: List[Dict] = None) -> List[Dict]:
-    """Search for orders with matching name that have phone numbers - uses JSON file first, then API"""
-    # Check cache first
-    normalized_name = normalize_name(name)
-    if cache is not None and normalized_name in cache:
-        cached_result = cache[normalized_name]
-        # Return cached result even if empty (to avoid re-searching names with no matches)
-        if isinstance(cached_result, list):
-            return cached_result
+def load_name_index_from_json(json_file: Path, phone_index: Dict[str, set] = None) -> tuple:
+    """
+    Stream the JSON export straight into a name index without holding every order in memory
+
+    If phone_index is given, it is filled in the same pass (see build_name_index).
+
+    Returns:
+        (name_index, orders_loaded)
+    """
+    if not json_file.exists():
+        return {}, 0
+
+    orders_loaded = 0
+
+    def counted_orders() -> Iterator[OrderRecord]:
+        nonlocal orders_loaded
+        for order in iter_order_records_from_json(json_file):
+            orders_loaded += 1
+            yield order
+
+    try:
+        return build_name_index(counted_orders(), phone_index), orders_loaded
+    except Exception as e:
+        print(f"⚠️  Could not load orders from JSON: {e}")
+        if phone_index is not None:
+            phone_index.clear()
+        return {}, 0
+
+def get_order_phone(order) -> str:
+    """Stripped billing phone of an API order dict or an OrderRecord"""
+    if type(order) is OrderRecord:
+        return order.phone
+    return order.get('billing', {}).get('phone', '').strip()
+
+def build_name_index(orders: Iterable, phone_index: Dict[str, set] = None) -> Dict[str, List]:
+    """
+    Build an inverted index of normalized name -> orders that have a phone number.
+
+    Built once after load_orders_from_json so each name lookup is a dict hit
+    instead of a scan over every loaded order. Accepts OrderRecords or API order dicts.
+    If phone_index is given, the reverse view (phone -> set of normalized names)
+    is filled in place in the same pass.
+    """
+    name_index = {}
+    for order in orders:
+        if type(order) is OrderRecord:
+            phone = order.phone
+            name_key = order.name_key
+        else:
+            phone = get_order_phone(order)
+            name_key = get_name_key(order) if phone else None
+        if not phone:
+            continue
+        name_index.setdefault(name_key, []).append(order)
+        if phone_index is not None:
+            phone_index.setdefault(phone, set()).add(name_key)
+    return name_index
+
+def is_name_match_with_phone(order: Dict, normalized_name: str) -> bool:
+    """Check if an order belongs to the given normalized name and has a phone number"""
+    return bool(get_order_phone(order)) and get_name_key(order) == normalized_name
+
+def search_source_by_name(wc_client: WooCommerceClient, name: str, normalized_name: str) -> List[Dict]:
+    """
+    Search a single WooCommerce source for orders matching a name that have phone numbers.
+
+    Raises requests exceptions from the client so callers can report the failing source.
+    """
+    # Use WooCommerce search parameter - searches in billing name, shipping name, etc.
+    # This is exactly what WordPress admin does when you search for orders
+    search_params = {
+        'search': name,  # Search by the full name (WooCommerce will search in billing/shipping names)
+        'per_page': 100,
+        'page': 1,
+        'orderby': 'date',
+        'order': 'desc'
+        # Note: No 'status' filter - we want to find matches regardless of order status
+    }
 
     matching_orders = []
+    total_pages = 1
+    while search_params['page'] <= total_pages:
+        orders, total_pages, _ = wc_client.get_orders(search_params, ORDER_FIELDS)
+
+        if not orders:
+            break
+
+        # Verify name match (normalized comparison) and has phone
+        matching_orders.extend(order for order in orders if is_name_match_with_phone(order, normalized_name))
+
+        # If there are more pages, search them too (unlikely but possible)
+        search_params['page'] += 1
+
+    return matching_orders
+
+def merge_source_matches(source_results: List[List[Dict]]) -> List[Dict]:
+    """Merge per-source matches in source order, skipping order IDs already seen"""
+    seen_order_ids = set()
+    matching_orders = []
+    for orders in source_results:
+        for order in orders:
+            order_id = order.get('id')
+            if order_id in seen_order_ids:
+                continue
+            seen_order_ids.add(order_id)
+            matching_orders.append(order)
+    return matching_orders
 
-    # First, search in JSON file (much faster!)
-    if json_orders:
-        for order in json_orders:
-            order_name = get_user_name(order)
+def summarize_matches(matching_orders: List[Dict], sources: List[str], searched_at: Optional[str] = None) -> Dict:
+    """
+    Build the compact match summary that is cached per name
+
+    Only what matching needs is kept: phone -> number of matching orders, the
+    matched order IDs, which sources were consulted and when.
+    """
+    phones = {}
+    order_ids = []
+    for order in matching_orders:
+        if type(order) is OrderRecord:
+            phone = order.phone
+            order_ids.append(order.id)
+        else:
             phone = order.get('billing', {}).get('phone', '').strip()
+            order_ids.append(order.get('id'))
+        if phone:
+            phones[phone] = phones.get(phone, 0) + 1
+    return {
+        'phones': phones,
+        'order_ids': order_ids,
+        'sources': sources,
+        'searched_at': searched_at or datetime.now().isoformat(timespec='seconds'),
+    }
+
+def jaro_winkler(a: str, b: str, prefix_scale: float = 0.1) -> float:
+    """Jaro-Winkler similarity between two strings (1.0 = identical)"""
+    if a == b:
+        return 1.0
+    len_a, len_b = len(a), len(b)
+    if not len_a or not len_b:
+        return 0.0
+
+    match_distance = max(len_a, len_b) // 2 - 1
+    a_matches = [False] * len_a
+    b_matches = [False] * len_b
+    matches = 0
+    for i, char in enumerate(a):
+        start = max(0, i - match_distance)
+        end = min(i + match_distance + 1, len_b)
+        for j in range(start, end):
+            if not b_matches[j] and b[j] == char:
+                a_matches[i] = b_matches[j] = True
+                matches += 1
+                break
+    if not matches:
+        return 0.0
+
+    transpositions = 0
+    j = 0
+    for i in range(len_a):
+        if a_matches[i]:
+            while not b_matches[j]:
+                j += 1
+            if a[i] != b[j]:
+                transpositions += 1
+            j += 1
+
+    jaro = (matches / len_a + matches / len_b + (matches - transpositions / 2) / matches) / 3
+
+    prefix = 0
+    for char_a, char_b in zip(a[:4], b[:4]):
+        if char_a != char_b:
+            break
+        prefix += 1
+    return jaro + prefix * prefix_scale * (1 - jaro)
+
+class FuzzyNameMatcher:
+    """
+    Approximate lookup of a name key among the name index keys
+
+    Blocking uses two inverted indexes: token -> names, and a deletion
+    neighbourhood index (every token with up to 1-2 characters deleted ->
+    tokens) over the token vocabulary. Each query token is expanded to the
+    vocabulary tokens sharing a deletion variant and within `token_min_score`
+    Jaro-Winkler (memoized per token), and only names that contain a similar
+    token for every query token - or all but one, for queries of three or more
+    tokens - are scored, with Jaro-Winkler over token-sorted names. Token order
+    is ignored, so swapped first/last names match; a name of two or more tokens
+    fully contained in a longer one scores PARTIAL_NAME_SCORE. A single token
+    (e.g. a bare surname) is too ambiguous to match approximately: single-token
+    queries are not looked up, and a single-token name never matches a longer one.
+    """
+
+    PARTIAL_NAME_SCORE = 0.9
+
+    def __init__(self, names: Iterable[str], min_score: float = 0.9, token_min_score: float = 0.85,
+                 max_candidates: int = 50):
+        self.min_score = min_score
+        self.token_min_score = token_min_score
+        self.max_candidates = max_candidates
+        self.names = []
+        self.vocabulary = {}
+        self.tokens = []
+        self.token_postings = []
+        self.deletion_index = {}
+        self._similar_tokens_cache = {}
+        for name in names:
+            name_id = len(self.names)
+            self.names.append(name)
+            for token in set(name.split()):
+                token_id = self.vocabulary.get(token)
+                if token_id is None:
+                    token_id = self.vocabulary[token] = len(self.tokens)
+                    self.tokens.append(token)
+                    self.token_postings.append(set())
+                    for variant in self._deletions(token):
+                        self.deletion_index.setdefault(variant, []).append(token_id)
+                self.token_postings[token_id].add(name_id)
+
+    @staticmethod
+    def _deletions(token: str) -> set:
+        """The token plus every string obtained by deleting up to 1 (short tokens) or 2 characters"""
+        max_edits = 0 if len(token) <= 2 else 1 if len(token) <= 5 else 2
+        variants = {token}
+        frontier = {token}
+        for _ in range(max_edits):
+            frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+            variants |= frontier
+        return variants
+
+    def _similar_names(self, token: str) -> set:
+        """IDs of names containing a token similar to `token`"""
+        name_ids = self._similar_tokens_cache.get(token)
+        if name_ids is not None:
+            return name_ids
+
+        token_ids = set()
+        for variant in self._deletions(token):
+            token_ids.update(self.deletion_index.get(variant, ()))
+
+        name_ids = set()
+        for token_id in token_ids:
+            if jaro_winkler(token, self.tokens[token_id]) >= self.token_min_score:
+                name_ids |= self.token_postings[token_id]
+
+        self._similar_tokens_cache[token] = name_ids
+        return name_ids
+
+    def score(self, a: str, b: str) -> float:
+        """Similarity of two name keys, insensitive to token order"""
+        tokens_a, tokens_b = a.split(), b.split()
+        if min(len(tokens_a), len(tokens_b)) < 2 and len(tokens_a) != len(tokens_b):
+            # Jaro-Winkler's prefix bonus on token-sorted strings would otherwise let a bare
+            # surname match whichever full name happens to sort it first
+            return 0.0
+        score = jaro_winkler(' '.join(sorted(tokens_a)), ' '.join(sorted(tokens_b)))
+        shorter, longer = sorted((set(tokens_a), set(tokens_b)), key=len)
+        if len(shorter) >= 2 and shorter < longer:
+            score = max(score, self.PARTIAL_NAME_SCORE)
+        return score
+
+    def lookup(self, name_key: str) -> Optional[tuple]:
+        """
+        Find the most similar indexed name
 
-            # Check if names match (normalized comparison) and has phone
-            order_normalized = normalize_name(order_name)
-            if order_normalized == normalized_name and phone:
-                matching_orders.append(order)
+        Returns:
+            (matched_name, score) or None if nothing scores at least min_score
+            (always None for queries of fewer than two tokens)
+        """
+        query_tokens = set(name_key.split())
+        if len(query_tokens) < 2:
+            return None
+
+        token_sets = sorted((self._similar_names(token) for token in query_tokens), key=len)
+
+        candidate_ids = set.intersection(*token_sets)
+        if not candidate_ids and len(token_sets) >= 3:
+            # Allow one query token (e.g. an extra middle name) to be missing
+            for skip in range(len(token_sets)):
+                candidate_ids |= set.intersection(*(ids for idx, ids in enumerate(token_sets) if idx != skip))
+
+        # Score the candidates closest in length first (Jaro-Winkler drops quickly with length difference)
+        candidate_ids = sorted(candidate_ids, key=lambda name_id: (abs(len(self.names[name_id]) - len(name_key)), name_id))
+
+        best = None
+        for name_id in candidate_ids[:self.max_candidates]:
+            candidate_name = self.names[name_id]
+            score = self.score(name_key, candidate_name)
+            if score >= self.min_score and (best is None or score > best[1]):
+                best = (candidate_name, score)
+        return best
+
+def lower_confidence(match_confidence: str) -> str:
+    """One confidence tier lower ('low' stays 'low')"""
+    return CONFIDENCE_LEVELS[max(0, CONFIDENCE_LEVELS.index(match_confidence) - 1)]
+
+def collect_phone_names(phone: str, phone_index: Dict[str, set] = None, snapshot: 'OrderSnapshot' = None) -> set:
+    """Normalized names seen with a phone in the JSON export's phone index and the prefetched snapshot"""
+    names = set(phone_index.get(phone, ())) if phone_index else set()
+    if snapshot is not None:
+        names.update(snapshot.phone_names([phone])[phone])
+    return names
+
+def adjust_confidence_for_similarity(match_confidence: str, name_similarity: float) -> str:
+    """Lower the confidence tier for fuzzy name matches: one tier below 1.0, 'low' below 0.95"""
+    if name_similarity >= 1.0:
+        return match_confidence
+    if name_similarity < 0.95:
+        return 'low'
+    return {'high': 'medium', 'medium': 'low'}.get(match_confidence, 'low')
+
+def match_name_locally(normalized_name: str, name_index: Dict[str, List[OrderRecord]] = None,
+                       fuzzy_matcher: FuzzyNameMatcher = None) -> Optional[Dict]:
+    """Match a name against the JSON name index, exactly first and then fuzzily; None if nothing matched"""
+    if not name_index:
+        return None
 
-        # If we found matches in JSON, return them (no need to search API)
-        if matching_orders:
-            if cache is not None:
-                cache[normalized_name] = matching_orders
-            return matching_orders
+    matching_orders = name_index.get(normalized_name)
+    if matching_orders:
+        return summarize_matches(matching_orders, ['json'])
 
-    # Fallback to API search if JSON didn't have matches
-    seen_order_ids = set(order.get('id') for order in matching_orders)  # Track IDs from JSON
+    if fuzzy_matcher is not None:
+        fuzzy_match = fuzzy_matcher.lookup(normalized_name)
+        if fuzzy_match:
+            matched_name, score = fuzzy_match
+            match_summary = summarize_matches(name_index[matched_name], ['json-fuzzy'])
+            match_summary['matched_name'] = matched_name
+            match_summary['name_similarity'] = round(score, 3)
+            return match_summary
 
-    # Search across all WooCommerce sources via API using search parameter (like WordPress admin)
-    for source_idx, wc_client in enumerate(wc_clients):
-        # Use WooCommerce search parameter - searches in billing name, shipping name, etc.
-        # This is exactly what WordPress admin does when you search for orders
-        search_params = {
-            'search': name,  # Search by the full name (WooCommerce will search in billing/shipping names)
-            'per_page': 100,
-            'page': 1,
-            'orderby': 'date',
-            'order': 'desc'
-            # Note: No 'status' filter - we want to find matches regardless of order status
-        }
+    return None
 
-        try:
-            # Search with the name - WooCommerce will return matching orders
-            orders, total_pages, _ = wc_client.get_orders(search_params)
+def search_orders_by_name(wc_clients: List[WooCommerceClient], name: str, start_date: str, end_date: str,
+                          cache: Dict = None, name_index: Dict[str, List[OrderRecord]] = None,
+                          fuzzy_matcher: FuzzyNameMatcher = None) -> Dict:
+    """
+    Search for orders with matching name that have phone numbers - uses JSON name index first
+    (exact, then fuzzy if a fuzzy_matcher is given), then API
+
+    Returns:
+        Match summary (see summarize_matches), also stored in cache under the normalized name
+    """
+    # Check cache first
+    normalized_name = normalize_name(name)
+    if cache is not None:
+        cached_result = cache.get(normalized_name)
+        # Return cached result even if empty (to avoid re-searching names with no matches)
+        if cached_result is not None:
+            return cached_result
 
-            if orders:
-                # Filter orders that have phone numbers and verify name match
-                for order in orders:
-                    order_id = order.get('id')
-                    # Skip if we've seen this order from JSON or another source
-                    if order_id in seen_order_ids:
-                        continue
-                    seen_order_ids.add(order_id)
-
-                    order_name = get_user_name(order)
-                    phone = order.get('billing', {}).get('phone', '').strip()
-
-                    # Verify name match (normalized comparison) and has phone
-                    order_normalized = normalize_name(order_name)
-                    if order_normalized == normalized_name and phone:
-                        matching_orders.append(order)
-
-                # If there are more pages, search them too (unlikely but possible)
-                if total_pages > 1:
-                    for page in range(2, total_pages + 1):
-                        search_params['page'] = page
-                        orders, _, _ = wc_client.get_orders(search_params)
-
-                        if not orders:
-                            break
-
-                        for order in orders:
-                            order_id = order.get('id')
-                            if order_id in seen_order_ids:
-                                continue
-                            seen_order_ids.add(order_id)
-
-                            order_name = get_user_name(order)
-                            phone = order.get('billing', {}).get('phone', '').strip()
-                            order_normalized = normalize_name(order_name)
-                            if order_normalized == normalized_name and phone:
-                                matching_orders.append(order)
-
-                        time.sleep(0.1)  # Reduced rate limiting
+    # First, look up the name in the JSON index (much faster!)
+    match_summary = match_name_locally(normalized_name, name_index, fuzzy_matcher)
+
+    # If we found matches in JSON, return them (no need to search API)
+    if match_summary:
+        if cache is not None:
+            cache[normalized_name] = match_summary
+        return match_summary
 
+    # Fallback to API search across all WooCommerce sources if JSON didn't have matches
+    source_results = []
+    sources = []
+    for source_idx, wc_client in enumerate(wc_clients):
+        try:
+            source_results.append(search_source_by_name(wc_client, name, normalized_name))
+            sources.append(wc_client.base_url)
         except Exception as e:
             print(f"      ⚠️  Error searching source {source_idx + 1}: {e}")
             continue
 
+    match_summary = summarize_matches(merge_source_matches(source_results), sources)
+
     # Cache the result (even if empty, to avoid re-searching)
     if cache is not None:
-        cache[normalized_name] = matching_orders
+        cache[normalized_name] = match_summary
 
-    return matching_orders
+    return match_summary
 
-def load_name_cache(cache_file: Path) -> Dict:
-    """Load cached name search results"""
-    if cache_file.exists():
+def collect_source_searches(wc_clients: List[WooCommerceClient], futures: List[Future], normalized_name: str,
+                            cache: Dict = None) -> Dict:
+    """Wait for the per-source searches of one name and merge them into a match summary in source order"""
+    source_results = []
+    sources = []
+    for source_idx, (wc_client, future) in enumerate(zip(wc_clients, futures)):
         try:
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            source_results.append(future.result())
+            sources.append(wc_client.base_url)
         except Exception as e:
-            print(f"⚠️  Could not load cache: {e}")
-    return {}
+            print(f"      ⚠️  Error searching source {source_idx + 1}: {e}")
 
-def save_name_cache(cache_file: Path, cache: Dict):
-    """Save name search results to cache"""
+    match_summary = summarize_matches(merge_source_matches(source_results), sources)
+
+    # Cache the result (even if empty, to avoid re-searching)
+    if cache is not None:
+        cache[normalized_name] = match_summary
+
+    return match_summary
+
+def score_phone_matches(phones: Dict[str, int]) -> tuple:
+    """
+    Pick the most frequent phone and a confidence level from phone -> matching order counts
+
+    Returns:
+        (guessed_phone, match_confidence)
+    """
+    # Get the most frequent phone number
+    guessed_phone = max(phones.items(), key=lambda x: x[1])[0] if phones else None
+
+    # Determine confidence based on:
+    # 1. Number of matching orders
+    # 2. Whether all orders share the same phone number
+    total_orders_with_phones = sum(phones.values())
+    unique_phone_count = len(phones)
+
+    if total_orders_with_phones == 0:
+        match_confidence = 'low'
+    elif unique_phone_count == 1 and total_orders_with_phones >= 2:
+        # All matching orders have the same phone number - highest confidence
+        match_confidence = 'high'
+    elif unique_phone_count == 1 and total_orders_with_phones == 1:
+        # Only one order found, but it has a phone number
+        match_confidence = 'medium'
+    elif unique_phone_count > 1:
+        # Multiple different phone numbers found - lower confidence
+        # But if most orders share the same number, it's still medium
+        most_common_count = max(phones.values())
+        if most_common_count >= total_orders_with_phones * 0.7:  # 70% or more share the same number
+            match_confidence = 'medium'
+        else:
+            match_confidence = 'low'
+    else:
+        match_confidence = 'medium'
+
+    return guessed_phone, match_confidence
+
+def score_phone_matches_batch(phone_tallies: List[Dict[str, int]]) -> List[tuple]:
+    """
+    Score many names at once; gives the same (guessed_phone, match_confidence) as score_phone_matches
+
+    With NumPy the (name, phone, count) rows are flattened into arrays and grouped
+    by name in one vectorized pass; without it every tally is scored in turn.
+    """
+    if not HAS_NUMPY or len(phone_tallies) < SCORE_BATCH_MIN_SIZE:
+        return [score_phone_matches(phones) for phones in phone_tallies]
+
+    results = [(None, 'low')] * len(phone_tallies)
+    lengths = np.fromiter(map(len, phone_tallies), dtype=np.int64, count=len(phone_tallies))
+    groups = np.flatnonzero(lengths)
+    if not len(groups):
+        return results
+
+    phone_numbers = list(chain.from_iterable(phone_tallies))
+    counts = np.fromiter(chain.from_iterable(map(dict.values, phone_tallies)), dtype=np.int64,
+                         count=len(phone_numbers))
+    group_lengths = lengths[groups]
+    starts = np.cumsum(group_lengths) - group_lengths
+    totals = np.add.reduceat(counts, starts)
+    most_common = np.maximum.reduceat(counts, starts)
+
+    # Guessed phone: the first phone with the highest count in each tally (as max() picks it)
+    rows = np.arange(len(counts))
+    is_most_common = counts == np.repeat(most_common, group_lengths)
+    first_max_rows = np.minimum.reduceat(np.where(is_most_common, rows, len(counts)), starts)
+
+    # Confidence rules of score_phone_matches, as indexes into CONFIDENCE_LEVELS
+    low, medium, high = (CONFIDENCE_LEVELS.index(level) for level in ('low', 'medium', 'high'))
+    confidence = np.select(
+        [totals == 0, (group_lengths == 1) & (totals >= 2), (group_lengths == 1) & (totals == 1), group_lengths > 1],
+        [low, high, medium, np.where(most_common >= totals * 0.7, medium, low)],
+        default=medium,
+    )
+
+    for name_idx, row, level in zip(groups.tolist(), first_max_rows.tolist(), confidence.tolist()):
+        results[name_idx] = (phone_numbers[row], CONFIDENCE_LEVELS[level])
+    return results
+
+def compact_cache_entry(entry, updated_at: Optional[float] = None) -> Dict:
+    """Convert a legacy cache entry (full list of matching orders) to a match summary"""
+    if isinstance(entry, dict):
+        return entry
+    searched_at = datetime.fromtimestamp(updated_at).isoformat(timespec='seconds') if updated_at else None
+    return summarize_matches(entry, [], searched_at)
+
+class NameSearchCache:
+    """
+    SQLite-backed cache of name match summaries (see summarize_matches), keyed by normalized name
+
+    Supports the dict operations the matcher uses (get, `in`, item assignment)
+    but reads entries on demand and only writes back entries changed since the
+    last save. Entries expire after `ttl` seconds; empty (negative) results use
+    the shorter `negative_ttl`. Rows still holding full order lists are
+    compacted when the cache is opened.
+    """
+
+    def __init__(self, db_file: Path, ttl: float = CACHE_TTL, negative_ttl: float = NEGATIVE_CACHE_TTL):
+        self.db_file = db_file
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._pending = {}
+        self._conn = sqlite3.connect(str(db_file))
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS name_search_cache (
+                normalized_name TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                match_count INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+        self._compact_legacy_rows()
+
+    def _compact_legacy_rows(self):
+        """Rewrite rows stored as full order lists as match summaries"""
+        legacy_rows = self._conn.execute(
+            "SELECT normalized_name, result, updated_at FROM name_search_cache WHERE result LIKE '[%'"
+        ).fetchall()
+        if not legacy_rows:
+            return
+        self._conn.executemany(
+            'UPDATE name_search_cache SET result = ? WHERE normalized_name = ?',
+            [
+                (json.dumps(compact_cache_entry(json.loads(result), updated_at), ensure_ascii=False), normalized_name)
+                for normalized_name, result, updated_at in legacy_rows
+            ]
+        )
+        self._conn.commit()
+        print(f"   📦 Compacted {len(legacy_rows)} cached name searches")
+
+    def _is_fresh(self, match_count: int, updated_at: float) -> bool:
+        ttl = self.ttl if match_count else self.negative_ttl
+        return time.time() - updated_at < ttl
+
+    def get(self, normalized_name: str, default=None):
+        """Get a cached result, or default if missing or expired"""
+        if normalized_name in self._pending:
+            return self._pending[normalized_name][0]
+        row = self._conn.execute(
+            'SELECT result, match_count, updated_at FROM name_search_cache WHERE normalized_name = ?',
+            (normalized_name,)
+        ).fetchone()
+        if row is None or not self._is_fresh(row[1], row[2]):
+            return default
+        return json.loads(row[0])
+
+    def __contains__(self, normalized_name: str) -> bool:
+        return self.get(normalized_name) is not None
+
+    def __getitem__(self, normalized_name: str):
+        result = self.get(normalized_name)
+        if result is None:
+            raise KeyError(normalized_name)
+        return result
+
+    def __setitem__(self, normalized_name: str, result):
+        self._pending[normalized_name] = (result, time.time())
+
+    def count_entries(self) -> tuple:
+        """
+        Count unexpired saved entries
+
+        Returns:
+            (total_entries, entries_with_results)
+        """
+        now = time.time()
+        return self._conn.execute("""
+            SELECT COUNT(*), COALESCE(SUM(match_count > 0), 0) FROM name_search_cache
+            WHERE (match_count > 0 AND updated_at > ?) OR (match_count = 0 AND updated_at > ?)
+        """, (now - self.ttl, now - self.negative_ttl)).fetchone()
+
+    def save(self) -> int:
+        """Upsert the entries changed since the last save; returns how many were written"""
+        rows = [
+            (normalized_name, json.dumps(result, ensure_ascii=False), len(result['order_ids']), updated_at)
+            for normalized_name, (result, updated_at) in self._pending.items()
+        ]
+        self._conn.executemany("""
+            INSERT INTO name_search_cache (normalized_name, result, match_count, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(normalized_name) DO UPDATE SET
+                result = excluded.result,
+                match_count = excluded.match_count,
+                updated_at = excluded.updated_at
+        """, rows)
+        self._conn.commit()
+        self._pending.clear()
+        return len(rows)
+
+    def close(self):
+        self._conn.close()
+
+def migrate_json_name_cache(json_file: Path, cache_file: Path):
+    """Import a legacy whole-file JSON name cache into a new SQLite cache, compacting each entry"""
+    if not json_file.exists() or cache_file.exists():
+        return
     try:
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache, f, ensure_ascii=False, indent=2)
+        with open(json_file, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        cache = NameSearchCache(cache_file)
+        for normalized_name, result in entries.items():
+            if isinstance(result, (list, dict)):
+                cache[normalized_name] = compact_cache_entry(result)
+        migrated = cache.save()
+        cache.close()
+        print(f"📦 Migrated {migrated} name searches from {json_file.name} to {cache_file.name}")
     except Exception as e:
-        print(f"⚠️  Could not save cache: {e}")
+        print(f"⚠️  Could not migrate cache: {e}")
+
+class OrderSnapshot:
+    """
+    Local SQLite snapshot of every source's orders with phone numbers, indexed by normalized name
+
+    sync_source pages through a source's whole /orders history once (later syncs
+    only fetch orders modified since the stored high-water mark), so name matching
+    can run offline with match() instead of one search= request per name and
+    source. Orders deleted on the server stay in the snapshot until
+    --refresh-snapshot downloads it again.
+    """
+
+    def __init__(self, db_file: Path):
+        self.db_file = db_file
+        # Sources usable for matching, in the order they were synced
+        self.sources = []
+        self._conn = sqlite3.connect(str(db_file))
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS snapshot_orders (
+                source TEXT NOT NULL,
+                order_id INTEGER NOT NULL,
+                name_key TEXT NOT NULL,
+                phone TEXT NOT NULL,
+                date_created TEXT,
+                PRIMARY KEY (source, order_id)
+            );
+            CREATE INDEX IF NOT EXISTS snapshot_orders_name_key ON snapshot_orders (name_key);
+            CREATE INDEX IF NOT EXISTS snapshot_orders_phone ON snapshot_orders (phone);
+            CREATE TABLE IF NOT EXISTS snapshot_sources (
+                source TEXT PRIMARY KEY,
+                high_water_mark TEXT NOT NULL,
+                synced_at REAL NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def _load_high_water_mark(self, source: str) -> Optional[Dict]:
+        row = self._conn.execute(
+            'SELECT high_water_mark FROM snapshot_sources WHERE source = ?', (source,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _store_orders(self, source: str, orders: List[Dict]):
+        """Upsert orders with a phone number; drop orders that no longer have one"""
+        rows = []
+        removed = []
+        for order in orders:
+            phone = order.get('billing', {}).get('phone', '').strip()
+            if phone:
+                rows.append((source, order.get('id'), get_name_key(order), phone, order.get('date_created')))
+            else:
+                removed.append((source, order.get('id')))
+        self._conn.executemany("""
+            INSERT INTO snapshot_orders (source, order_id, name_key, phone, date_created)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(source, order_id) DO UPDATE SET
+                name_key = excluded.name_key,
+                phone = excluded.phone,
+                date_created = excluded.date_created
+        """, rows)
+        self._conn.executemany('DELETE FROM snapshot_orders WHERE source = ? AND order_id = ?', removed)
+
+    def sync_source(self, wc_client: WooCommerceClient, page_workers: int = 4, serial: bool = False,
+                    full: bool = False) -> int:
+        """
+        Bring one source's snapshot up to date (see fetch_order_pages for paging)
+
+        Returns:
+            Number of orders downloaded
+        """
+        source = wc_client.base_url
+        high_water_mark = None if full else self._load_high_water_mark(source)
+        params = {'orderby': 'date', 'order': 'desc'}
+        if high_water_mark is None:
+            print(f"📥 Prefetching all orders from {source}...")
+            high_water_mark = {}
+            self._conn.execute('DELETE FROM snapshot_orders WHERE source = ?', (source,))
+        else:
+            modified_after = high_water_mark.get('date_modified') or high_water_mark.get('date_created')
+            print(f"📥 Updating snapshot of {source} (orders modified after {modified_after})...")
+            if modified_after:
+                params['modified_after'] = modified_after
+
+        downloaded = 0
+
+        def add_page(orders: List[Dict]):
+            nonlocal downloaded
+            update_high_water_mark(high_water_mark, orders)
+            self._store_orders(source, orders)
+            downloaded += len(orders)
+            print(f"Stored {len(orders)} orders")
+
+        try:
+            fetch_order_pages(wc_client, params, add_page, page_workers, serial, SNAPSHOT_FIELDS)
+        except BaseException:
+            self._conn.rollback()
+            raise
+
+        self._conn.execute("""
+            INSERT INTO snapshot_sources (source, high_water_mark, synced_at) VALUES (?, ?, ?)
+            ON CONFLICT(source) DO UPDATE SET
+                high_water_mark = excluded.high_water_mark,
+                synced_at = excluded.synced_at
+        """, (source, json.dumps(high_water_mark), time.time()))
+        self._conn.commit()
+        self.sources.append(source)
+        METRICS.inc('snapshot_orders_downloaded_total', downloaded, source=wc_client.source)
+        return downloaded
+
+    def sync(self, wc_clients: List[WooCommerceClient], page_workers: int = 4, serial: bool = False,
+             full: bool = False):
+        """Sync every source; a source that fails keeps its previous snapshot if it has one"""
+        for source_idx, wc_client in enumerate(wc_clients):
+            try:
+                downloaded = self.sync_source(wc_client, page_workers, serial, full)
+                print(f"   ✅ {downloaded} orders downloaded from source {source_idx + 1}")
+            except Exception as e:
+                if self._load_high_water_mark(wc_client.base_url) is not None:
+                    print(f"   ⚠️  Error syncing source {source_idx + 1}, using its previous snapshot: {e}")
+                    self.sources.append(wc_client.base_url)
+                else:
+                    print(f"   ⚠️  Error syncing source {source_idx + 1}, skipping it: {e}")
+
+    def count_orders(self) -> int:
+        """Number of snapshot orders with phones across the usable sources"""
+        if not self.sources:
+            return 0
+        placeholders = ','.join('?' * len(self.sources))
+        return self._conn.execute(
+            f'SELECT COUNT(*) FROM snapshot_orders WHERE source IN ({placeholders})', self.sources
+        ).fetchone()[0]
+
+    def match(self, normalized_name: str) -> Dict:
+        """Match a name against the snapshot like an API search across all sources (see search_orders_by_name)"""
+        source_orders = {source: [] for source in self.sources}
+        rows = self._conn.execute("""
+            SELECT source, order_id, phone FROM snapshot_orders WHERE name_key = ?
+            ORDER BY date_created DESC, order_id DESC
+        """, (normalized_name,))
+        for source, order_id, phone in rows:
+            if source in source_orders:
+                source_orders[source].append({'id': order_id, 'billing': {'phone': phone}})
+        return summarize_matches(merge_source_matches(list(source_orders.values())), list(self.sources))
+
+    def phone_names(self, phones: Iterable[str]) -> Dict[str, set]:
+        """Normalized names seen with each phone across the usable sources (one indexed query per phone)"""
+        names = {}
+        for phone in phones:
+            rows = self._conn.execute('SELECT DISTINCT source, name_key FROM snapshot_orders WHERE phone = ?', (phone,))
+            names[phone] = {name_key for source, name_key in rows if source in self.sources}
+        return names
+
+    def close(self):
+        self._conn.close()
+
+def load_match_journal(journal_file: Path) -> Dict[str, Dict]:
+    """Read the Step 2 checkpoint journal (JSON Lines) into {normalized name: entry}"""
+    journal = {}
+    if not journal_file.exists():
+        return journal
+    with open(journal_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partially written last line from an interrupted run
+            journal[entry['name']] = entry
+    return journal
 
 def match_phone_numbers(wc_clients: List[WooCommerceClient], orders_without_phone: List[Dict],
-                        start_date: str, end_date: str, cache_file: Path = None, json_orders: List[Dict] = None) -> List[Dict]:
-    """Match orders without phone numbers to orders with phone numbers by name across multiple sources"""
+                        start_date: str, end_date: str, cache_file: Path = None, json_orders: List[OrderRecord] = None,
+                        name_index: Dict[str, List[OrderRecord]] = None, workers: int = 1,
+                        cache_ttl: float = CACHE_TTL, negative_cache_ttl: float = NEGATIVE_CACHE_TTL,
+                        fuzzy_matcher: FuzzyNameMatcher = None, journal_file: Path = None,
+                        resume: bool = False, on_result: Callable[[Dict], None] = None,
+                        snapshot: OrderSnapshot = None, phone_index: Dict[str, set] = None,
+                        phone_fanout_threshold: int = PHONE_FANOUT_THRESHOLD) -> List[Dict]:
+    """
+    Match orders without phone numbers to orders with phone numbers by name across multiple sources
+
+    Each name is answered by the cache, the JSON index (fuzzy_matcher as fallback), the
+    snapshot or an API search, in that order; results are produced in name order.
+
+    Args:
+        cache_file: SQLite name search cache (see NameSearchCache)
+        workers: Concurrent API searches (1 searches names one at a time)
+        journal_file: Checkpoint (JSON Lines, one line per name); resume=True restores names from it
+        on_result: Called with every row as soon as its name is done; rows are then not collected
+        snapshot: Local order snapshot used instead of API searches (see OrderSnapshot)
+        phone_index: Phone -> names of the JSON export, for phone_fanout/shared_phone
+        phone_fanout_threshold: Rows whose phone is seen with more names are shared_phone, one tier lower
+
+    Returns:
+        Result rows (empty when on_result is given)
+    """
     print("\n🔍 Step 2: Searching for matching orders with phone numbers...")
     print(f"   Searching across {len(wc_clients)} source(s)...")
+    if workers > 1:
+        print(f"   Concurrent mode: {workers} workers")
+
+    journal = {}
+    if journal_file and resume:
+        journal = load_match_journal(journal_file)
+        if journal:
+            print(f"   Resuming from checkpoint: {len(journal)} names already processed")
+
+    # Index JSON orders once instead of scanning them for every name
+    if name_index is None and json_orders:
+        name_index = build_name_index(json_orders)
 
     # Load cache if available
     name_cache = {}
-    cached_count = 0
-    if cache_file and cache_file.exists():
-        name_cache = load_name_cache(cache_file)
-        # Count only non-empty cached results
-        cached_count = sum(1 for v in name_cache.values() if isinstance(v, list) and len(v) > 0)
-        if name_cache:
-            print(f"   Loaded {len(name_cache)} cached name searches ({cached_count} with results)")
+    if cache_file:
+        name_cache = NameSearchCache(cache_file, cache_ttl, negative_cache_ttl)
+        total_count, cached_count = name_cache.count_entries()
+        if total_count:
+            print(f"   Using {total_count} cached name searches ({cached_count} with results)")
     print()
 
     guessed_results = []
     unique_names = {}
     cache_updated = False
+    executor = None
+    search_futures = {}
+    phone_names = {}
+    cached_matches = {}
+    local_matches = {}
+    journal_handle = None
 
     try:
         # Group orders by normalized name
         for order in orders_without_phone:
             name = get_user_name(order)
-            normalized = normalize_name(name)
+            normalized = get_name_key(order)
 
             if normalized not in unique_names:
                 unique_names[normalized] = {
@@ -371,6 +1723,44 @@ def match_phone_numbers(wc_clients: List[WooCommerceClient], orders_without_phon
         print(f"📊 Found {len(unique_names)} unique names to search")
         print()
 
+        # Only reuse journal entries recorded for exactly the same orders
+        journal = {
+            normalized_name: entry for normalized_name, entry in journal.items()
+            if normalized_name in unique_names
+            and entry.get('order_ids') == [order.get('id') for order in unique_names[normalized_name]['orders']]
+        }
+        if journal_file:
+            journal_handle = open(journal_file, 'a' if resume else 'w', encoding='utf-8')
+            if journal_handle.tell():
+                journal_handle.write('\n')  # Terminate a line cut off by an interrupt
+
+        # Resolve names the cache, JSON index or snapshot can answer up front; with workers > 1, submit
+        # one search per (name, source) for the rest
+        if workers > 1 and snapshot is None:
+            executor = ThreadPoolExecutor(max_workers=workers)
+        for normalized_name, name_data in unique_names.items():
+            if name_data['name'] == 'نامشخص' or normalized_name in journal:
+                continue
+            cached_summary = name_cache.get(normalized_name)
+            if cached_summary is not None:
+                cached_matches[normalized_name] = cached_summary
+                continue
+            local_summary = match_name_locally(normalized_name, name_index, fuzzy_matcher)
+            if local_summary is None and snapshot is not None:
+                local_summary = snapshot.match(normalized_name)
+            if local_summary is not None:
+                local_matches[normalized_name] = local_summary
+            elif executor is not None:
+                search_futures[normalized_name] = [
+                    executor.submit(search_source_by_name, wc_client, name_data['name'], normalized_name)
+                    for wc_client in wc_clients
+                ]
+
+        # Score every name resolved up front in one batch; API results are scored as they arrive
+        resolved_matches = [*cached_matches.items(), *local_matches.items()]
+        phone_scores = dict(zip((normalized_name for normalized_name, _ in resolved_matches),
+                                score_phone_matches_batch([summary['phones'] for _, summary in resolved_matches])))
+
         for idx, (normalized_name, name_data) in enumerate(unique_names.items(), 1):
             name = name_data['name']
             orders = name_data['orders']
@@ -378,61 +1768,70 @@ def match_phone_numbers(wc_clients: List[WooCommerceClient], orders_without_phon
             if name == 'نامشخص':
                 continue
 
-            # Check if we have cached result
-            if normalized_name in name_cache:
-                cached_result = name_cache[normalized_name]
-                # Only use cache if it has results (re-search if empty cache)
-                if isinstance(cached_result, list) and len(cached_result) > 0:
-                    print(f"[{idx}/{len(unique_names)}] Searching for: {name}... (cached)", end=' ')
-                    matching_orders = cached_result
+            # Restore names finished by an interrupted run
+            if normalized_name in journal:
+                if on_result:
+                    for result in journal[normalized_name]['results']:
+                        on_result(result)
                 else:
-                    # Cache has empty result, but let's re-search to be sure
-                    print(f"[{idx}/{len(unique_names)}] Searching for: {name}... (re-searching)", end=' ')
-                    matching_orders = search_orders_by_name(wc_clients, name, start_date, end_date, name_cache)
-                    cache_updated = True
+                    guessed_results.extend(journal[normalized_name]['results'])
+                print(f"[{idx}/{len(unique_names)}] Searching for: {name}... (resumed)")
+                METRICS.inc('name_lookups_total', source='checkpoint')
+                continue
+
+            # Check if we have cached result (empty results expire sooner and are then re-searched)
+            if normalized_name in cached_matches:
+                match_summary = cached_matches.pop(normalized_name)
+                print(f"[{idx}/{len(unique_names)}] Searching for: {name}... (cached)", end=' ')
+                lookup_source = 'cache'
             else:
                 print(f"[{idx}/{len(unique_names)}] Searching for: {name}...", end=' ', flush=True)
                 # Search for matching orders across all sources
-                matching_orders = search_orders_by_name(wc_clients, name, start_date, end_date, name_cache)
+                if normalized_name in local_matches:
+                    match_summary = local_matches.pop(normalized_name)
+                    name_cache[normalized_name] = match_summary
+                elif normalized_name in search_futures:
+                    match_summary = collect_source_searches(wc_clients, search_futures.pop(normalized_name),
+                                                            normalized_name, name_cache)
+                else:
+                    match_summary = search_orders_by_name(wc_clients, name, start_date, end_date, name_cache, name_index,
+                                                          fuzzy_matcher)
                 cache_updated = True
-
-            if matching_orders:
-                # Get the most common phone number from matching orders
-                phones = {}
-                for match_order in matching_orders:
-                    phone = match_order.get('billing', {}).get('phone', '').strip()
-                    if phone:
-                        phones[phone] = phones.get(phone, 0) + 1
-
-                # Get the most frequent phone number
-                guessed_phone = max(phones.items(), key=lambda x: x[1])[0] if phones else None
-
-                # Determine confidence based on:
-                # 1. Number of matching orders
-                # 2. Whether all orders share the same phone number
+                lookup_source = next((source for source in match_summary['sources']
+                                      if source in ('json', 'json-fuzzy')), 'snapshot' if snapshot else 'api')
+            if isinstance(name_cache, NameSearchCache):
+                METRICS.inc('name_cache_requests_total', result='hit' if lookup_source == 'cache' else 'miss')
+            METRICS.inc('name_lookups_total', source=lookup_source,
+                        matched='yes' if match_summary['order_ids'] else 'no')
+
+            name_results = []
+            matching_orders_count = len(match_summary['order_ids'])
+            if matching_orders_count:
+                phones = match_summary['phones']
+                if normalized_name in phone_scores:
+                    guessed_phone, match_confidence = phone_scores.pop(normalized_name)
+                else:
+                    guessed_phone, match_confidence = score_phone_matches(phones)
+                name_similarity = match_summary.get('name_similarity', 1.0)
+                match_confidence = adjust_confidence_for_similarity(match_confidence, name_similarity)
                 total_orders_with_phones = sum(phones.values())
                 unique_phone_count = len(phones)
 
-                if total_orders_with_phones == 0:
-                    match_confidence = 'low'
-                elif unique_phone_count == 1 and total_orders_with_phones >= 2:
-                    # All matching orders have the same phone number - highest confidence
-                    match_confidence = 'high'
-                elif unique_phone_count == 1 and total_orders_with_phones == 1:
-                    # Only one order found, but it has a phone number
-                    match_confidence = 'medium'
-                elif unique_phone_count > 1:
-                    # Multiple different phone numbers found - lower confidence
-                    # But if most orders share the same number, it's still medium
-                    most_common_count = max(phones.values())
-                    if most_common_count >= total_orders_with_phones * 0.7:  # 70% or more share the same number
-                        match_confidence = 'medium'
-                    else:
-                        match_confidence = 'low'
-                else:
-                    match_confidence = 'medium'
-
-                print(f"✅ Found {len(matching_orders)} matching orders ({total_orders_with_phones} with phones, {unique_phone_count} unique), phone: {guessed_phone}, confidence: {match_confidence}")
+                # Phone fan-out: different names seen with the guessed phone (the matched name included);
+                # a phone shared by many names (family or courier number) drops one confidence tier
+                corpus_names = phone_names.get(guessed_phone)
+                if corpus_names is None:
+                    corpus_names = phone_names[guessed_phone] = collect_phone_names(guessed_phone, phone_index,
+                                                                                    snapshot)
+                matched_name = match_summary.get('matched_name', normalized_name)
+                phone_fanout = len(corpus_names) + (matched_name not in corpus_names)
+                shared_phone = phone_fanout > phone_fanout_threshold
+                if shared_phone:
+                    match_confidence = lower_confidence(match_confidence)
+
+                fuzzy_note = f", fuzzy: {match_summary.get('matched_name')} ({name_similarity})" if name_similarity < 1.0 else ''
+                shared_note = f", shared phone: {phone_fanout} names" if shared_phone else ''
+                print(f"✅ Found {matching_orders_count} matching orders ({total_orders_with_phones} with phones, {unique_phone_count} unique), phone: {guessed_phone}, confidence: {match_confidence}{fuzzy_note}{shared_note}")
 
                 # Create result for each order without phone
                 for order in orders:
@@ -440,7 +1839,7 @@ def match_phone_numbers(wc_clients: List[WooCommerceClient], orders_without_phon
                     transaction_id = extract_transaction_id(order)
 
                     if snapppay_token:
-                        guessed_results.append({
+                        name_results.append({
                             'order_id': order.get('id'),
                             'order_date': order.get('date_created'),
                             'user_name': name,
@@ -448,8 +1847,11 @@ def match_phone_numbers(wc_clients: List[WooCommerceClient], orders_without_phon
                             'transaction_id': transaction_id or '',
                             'guessed_phone': guessed_phone or '',
                             'match_confidence': match_confidence,
-                            'matching_orders_count': len(matching_orders),
+                            'matching_orders_count': matching_orders_count,
                             'unique_phone_count': unique_phone_count,
+                            'name_similarity': name_similarity,
+                            'phone_fanout': phone_fanout,
+                            'shared_phone': shared_phone,
                             'billing': {
                                 'first_name': order.get('billing', {}).get('first_name', ''),
                                 'last_name': order.get('billing', {}).get('last_name', ''),
@@ -468,27 +1870,75 @@ def match_phone_numbers(wc_clients: List[WooCommerceClient], orders_without_phon
             else:
                 print("❌ No matches found")
 
-            time.sleep(0.1)  # Reduced rate limiting
+            if name_results:
+                METRICS.inc('results_total', len(name_results), confidence=match_confidence)
+                if shared_phone:
+                    METRICS.inc('shared_phone_results_total', len(name_results))
+            if on_result:
+                for result in name_results:
+                    on_result(result)
+            else:
+                guessed_results.extend(name_results)
+            if journal_handle:
+                journal_handle.write(json.dumps({
+                    'name': normalized_name,
+                    'order_ids': [order.get('id') for order in orders],
+                    'results': name_results,
+                }, ensure_ascii=False) + '\n')
+                journal_handle.flush()
 
     finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if journal_handle:
+            journal_handle.close()
+
         # Always save cache if it was updated (even on early exit/interrupt)
-        if cache_file and cache_updated:
-            save_name_cache(cache_file, name_cache)
-            print(f"\n💾 Saved {len(name_cache)} name searches to cache")
+        if isinstance(name_cache, NameSearchCache):
+            if cache_updated:
+                saved_count = name_cache.save()
+                print(f"\n💾 Saved {saved_count} name searches to cache")
+            name_cache.close()
 
     return guessed_results
 
-def write_results(output_file: Path, results: List[Dict], format_type: str = 'json'):
-    """Write results to file"""
+def flatten_result(result: Dict) -> Dict:
+    """Flatten a guessed result row into the RESULT_CSV_FIELDS columns"""
+    row = {field: result.get(field, '') for field in RESULT_CSV_FIELDS}
+    row['billing_city'] = result.get('billing', {}).get('city', '')
+    return row
+
+def write_results(output_file: Path, results: Iterable[Dict], format_type: str = 'json') -> int:
+    """
+    Write results to file (timed in METRICS as the write_<format> stage)
+
+    results may be any iterable (e.g. rows streamed back from the JSON Lines output);
+    rows are written one at a time, so they are never all held in memory.
+    Returns the number of rows written.
+    """
+    with METRICS.timer(f"write_{format_type}"):
+        count = _write_results(output_file, results, format_type)
+    METRICS.inc('rows_written_total', count, format=format_type)
+    return count
+
+def _write_results(output_file: Path, results: Iterable[Dict], format_type: str) -> int:
+    count = 0
     if format_type == 'json':
+        # Same layout as json.dump with indent=2, written one row at a time
         with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
-        print(f"\n✅ Written {len(results)} results to JSON: {output_file}")
+            f.write('[')
+            for result in results:
+                result_json = json.dumps(result, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+                f.write((',\n  ' if count else '\n  ') + result_json)
+                count += 1
+            f.write('\n]' if count else ']')
+        print(f"\n✅ Written {count} results to JSON: {output_file}")
 
     elif format_type == 'xlsx' and HAS_OPENPYXL:
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Guessed Orders"
+        # Write-only workbook: rows stream to disk as plain values, styled by shared conditional formatting
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Guessed Orders")
 
         # Headers
         headers = ['Order ID', 'Order Date', 'User Name', 'Guessed Phone',
@@ -502,43 +1952,43 @@ def write_results(output_file: Path, results: List[Dict], format_type: str = 'js
             left=Side(style='thin'), right=Side(style='thin'),
             top=Side(style='thin'), bottom=Side(style='thin')
         )
+        stripe_fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
 
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num, value=header)
+        # Column widths, frozen header and header height must be set before rows are streamed
+        column_widths = [12, 20, 25, 15, 40, 25, 15, 15, 15, 12, 12]
+        for col_num, width in enumerate(column_widths, 1):
+            ws.column_dimensions[get_column_letter(col_num)].width = width
+        ws.freeze_panes = 'A2'
+        ws.row_dimensions[1].height = 30
+
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
             cell.font = header_font
             cell.fill = header_fill
             cell.alignment = header_alignment
             cell.border = border
-
-        ws.freeze_panes = 'A2'
+            header_cells.append(cell)
+        ws.append(header_cells)
 
         # Data
-        for row_num, result in enumerate(results, 2):
-            ws.cell(row=row_num, column=1, value=result['order_id']).border = border
-            ws.cell(row=row_num, column=2, value=result['order_date']).border = border
-            ws.cell(row=row_num, column=3, value=result['user_name']).border = border
-            ws.cell(row=row_num, column=4, value=result['guessed_phone']).border = border
-            ws.cell(row=row_num, column=5, value=result['snapppay_token']).border = border
-            ws.cell(row=row_num, column=6, value=result['transaction_id']).border = border
-            ws.cell(row=row_num, column=7, value=result['match_confidence']).border = border
-            ws.cell(row=row_num, column=8, value=result['matching_orders_count']).border = border
-            ws.cell(row=row_num, column=9, value=result['billing']['city']).border = border
-            ws.cell(row=row_num, column=10, value=result['total']).border = border
-            ws.cell(row=row_num, column=11, value=result['status']).border = border
-
-            if row_num % 2 == 0:
-                fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-                for col in range(1, 12):
-                    ws.cell(row=row_num, column=col).fill = fill
-
-        # Auto-adjust columns
-        column_widths = [12, 20, 25, 15, 40, 25, 15, 15, 15, 12, 12]
-        for col_num, width in enumerate(column_widths, 1):
-            ws.column_dimensions[get_column_letter(col_num)].width = width
+        for result in results:
+            ws.append([
+                result['order_id'], result['order_date'], result['user_name'], result['guessed_phone'],
+                result['snapppay_token'], result['transaction_id'], result['match_confidence'],
+                result['matching_orders_count'], result['billing']['city'], result['total'], result['status'],
+            ])
+            count += 1
+
+        # Borders on every data cell, alternate row colors on even rows (added once the row count is known)
+        if count:
+            data_range = f"A2:{get_column_letter(len(headers))}{count + 1}"
+            ws.conditional_formatting.add(data_range, FormulaRule(formula=['MOD(ROW(),2)=0'], fill=stripe_fill,
+                                                                  border=border))
+            ws.conditional_formatting.add(data_range, FormulaRule(formula=['MOD(ROW(),2)=1'], border=border))
 
-        ws.row_dimensions[1].height = 30
         wb.save(output_file)
-        print(f"\n✅ Written {len(results)} results to Excel: {output_file}")
+        print(f"\n✅ Written {count} results to Excel: {output_file}")
 
     elif format_type == 'html':
         # WooCommerce API credentials (embedded in HTML for internal use)
@@ -546,11 +1996,9 @@ def write_results(output_file: Path, results: List[Dict], format_type: str = 'js
         wc_consumer_key = 'WOOCOMMERCE_CONSUMER_KEY'
         wc_consumer_secret = 'WOOCOMMERCE_CONSUMER_SECRET'
 
-        # Serialize orders data for JavaScript (use base64 encoding to avoid escaping issues)
-        orders_json = json.dumps(results, ensure_ascii=False)
-        orders_json_b64 = base64.b64encode(orders_json.encode('utf-8')).decode('ascii')
-
-        html_content = f"""<!DOCTYPE html>
+        # The page is streamed to disk: static markup first, then the rows as embedded JSON data
+        # that the browser renders one page at a time
+        html_head = f"""<!DOCTYPE html>
 <html lang="fa" dir="rtl">
 <head>
     <meta charset="UTF-8">
@@ -832,6 +2280,29 @@ def write_results(output_file: Path, results: List[Dict], format_type: str = 'js
             height: 18px;
             cursor: pointer;
         }}
+
+        .pagination {{
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            gap: 15px;
+            padding: 0 20px 20px;
+            color: #495057;
+            font-size: 14px;
+        }}
+
+        .btn-page {{
+            background: #f8f9fa;
+            border: 1px solid #e9ecef;
+            border-radius: 6px;
+            padding: 8px 16px;
+            cursor: pointer;
+            font-size: 13px;
+        }}
+
+        .btn-page:hover {{
+            background: #e7f3ff;
+        }}
     </style>
     <script>
         // WooCommerce API Configuration
@@ -841,27 +2312,99 @@ def write_results(output_file: Path, results: List[Dict], format_type: str = 'js
             consumerSecret: '{wc_consumer_secret}'
         }};
 
-        // Orders data embedded in HTML (base64 encoded for safety)
-        const ORDERS_DATA_JSON = atob('{orders_json_b64}');
-        const ORDERS_DATA = JSON.parse(ORDERS_DATA_JSON);
+        // Orders data is embedded as JSON at the end of the page and rendered one page at a time
+        let ORDERS_DATA = [];
+        const UPDATE_STATE = {{}};
+        let currentPage = 1;
+        let pageSize = 100;
 
-        // Update single order
-        async function updateOrderPhone(orderId, phoneNumber, buttonElement) {{
-            if (!phoneNumber || phoneNumber === 'N/A') {{
-                showMessage('خطا: شماره تلفن معتبر نیست', 'error');
-                return;
+        function escapeHtml(value) {{
+            return String(value ?? '').replace(/[&<>"']/g, c => ({{
+                '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+            }})[c]);
+        }}
+
+        // Render one table row from the data and its update state
+        function renderRow(order, index) {{
+            const phoneValue = order.guessed_phone || 'N/A';
+            const state = UPDATE_STATE[order.order_id] || {{}};
+            const confidence = escapeHtml(order.match_confidence);
+
+            let buttonLabel = 'به‌روزرسانی';
+            let buttonClass = 'btn-update';
+            let buttonStyle = '';
+            if (state.status === 'loading') {{
+                buttonLabel = '';
+                buttonClass += ' loading';
+            }} else if (state.status === 'updated') {{
+                buttonLabel = '✓ به‌روزرسانی شد';
+                buttonStyle = ' style="background: #28a745"';
             }}
+            const buttonDisabled = phoneValue === 'N/A' || state.status === 'loading' || state.status === 'updated';
 
-            const row = buttonElement.closest('tr');
-            const statusCell = row.querySelector('.update-status');
+            let statusHtml = '';
+            if (state.status === 'updated') {{
+                statusHtml = '<span class="status-updated">به‌روزرسانی شد</span>';
+            }} else if (state.status === 'error') {{
+                statusHtml = `<span class="status-error">خطا: ${{escapeHtml(state.message)}}</span>`;
+            }}
 
-            // Disable button and show loading
-            buttonElement.disabled = true;
-            buttonElement.classList.add('loading');
-            buttonElement.textContent = '';
+            return `
+                    <tr data-order-id="${{escapeHtml(order.order_id)}}">
+                        <td class="order-id">${{escapeHtml(order.order_id)}}</td>
+                        <td>${{escapeHtml(order.order_date)}}</td>
+                        <td>${{escapeHtml(order.user_name)}}</td>
+                        <td class="phone">${{escapeHtml(phoneValue)}}</td>
+                        <td class="token">${{escapeHtml(order.snapppay_token)}}</td>
+                        <td class="token">${{escapeHtml(order.transaction_id)}}</td>
+                        <td><span class="confidence-${{confidence}}">${{confidence.toUpperCase()}}</span></td>
+                        <td>${{escapeHtml(order.matching_orders_count)}}</td>
+                        <td>${{escapeHtml((order.billing || {{}}).city)}}</td>
+                        <td>${{escapeHtml(order.total)}}</td>
+                        <td>${{escapeHtml(order.status)}}</td>
+                        <td>
+                            <button class="${{buttonClass}}"${{buttonStyle}} onclick="updateOrderPhone(${{index}})"
+                                    ${{buttonDisabled ? 'disabled' : ''}}>${{buttonLabel}}</button>
+                        </td>
+                        <td class="update-status">${{statusHtml}}</td>
+                    </tr>`;
+        }}
+
+        // Render only the rows of the current page
+        function renderPage() {{
+            const pageCount = Math.max(1, Math.ceil(ORDERS_DATA.length / pageSize));
+            currentPage = Math.min(Math.max(currentPage, 1), pageCount);
+            const start = (currentPage - 1) * pageSize;
+            const end = Math.min(start + pageSize, ORDERS_DATA.length);
+
+            const rows = [];
+            for (let i = start; i < end; i++) {{
+                rows.push(renderRow(ORDERS_DATA[i], i));
+            }}
+            document.getElementById('orders-body').innerHTML = rows.join('');
+            document.getElementById('page-info').textContent =
+                `صفحه ${{currentPage}} از ${{pageCount}} (${{ORDERS_DATA.length}} سفارش)`;
+        }}
+
+        function goToPage(page) {{
+            currentPage = page;
+            renderPage();
+        }}
+
+        function setPageSize(size) {{
+            const firstIndex = (currentPage - 1) * pageSize;
+            pageSize = parseInt(size, 10);
+            currentPage = Math.floor(firstIndex / pageSize) + 1;
+            renderPage();
+        }}
+
+        // Send one phone update to WooCommerce and record the outcome in UPDATE_STATE
+        async function pushOrderPhone(order) {{
+            UPDATE_STATE[order.order_id] = {{ status: 'loading' }};
+            renderPage();
 
             try {{
-                const url = `${{WC_CONFIG.baseUrl}}/wp-json/wc/v3/orders/${{orderId}}`;
+                const url = `${{WC_CONFIG.baseUrl}}/wp-json/wc/v3/orders/${{order.order_id}}`;
                 const params = new URLSearchParams({{
                     consumer_key: WC_CONFIG.consumerKey,
                     consumer_secret: WC_CONFIG.consumerSecret
@@ -874,7 +2417,7 @@ def write_results(output_file: Path, results: List[Dict], format_type: str = 'js
                     }},
                     body: JSON.stringify({{
                         billing: {{
-                            phone: phoneNumber
+                            phone: order.guessed_phone
                         }}
                     }})
                 }});
@@ -884,34 +2427,32 @@ def write_results(output_file: Path, results: List[Dict], format_type: str = 'js
                     throw new Error(errorData.message || `HTTP ${{response.status}}: ${{response.statusText}}`);
                 }}
 
-                const updatedOrder = await response.json();
-
-                // Success
-                buttonElement.disabled = true;
-                buttonElement.classList.remove('loading');
-                buttonElement.textContent = '✓ به‌روزرسانی شد';
-                buttonElement.style.background = '#28a745';
-
-                if (statusCell) {{
-                    statusCell.innerHTML = '<span class="status-updated">به‌روزرسانی شد</span>';
-                }}
-
-                showMessage(`سفارش #${{orderId}} با موفقیت به‌روزرسانی شد`, 'success');
-
-                // Update stats
-                updateStats();
+                UPDATE_STATE[order.order_id] = {{ status: 'updated' }};
+                return true;
 
             }} catch (error) {{
                 console.error('Update error:', error);
-                buttonElement.disabled = false;
-                buttonElement.classList.remove('loading');
-                buttonElement.textContent = 'به‌روزرسانی';
+                UPDATE_STATE[order.order_id] = {{ status: 'error', message: error.message }};
+                return false;
 
-                if (statusCell) {{
-                    statusCell.innerHTML = `<span class="status-error">خطا: ${{error.message}}</span>`;
-                }}
+            }} finally {{
+                renderPage();
+                updateStats();
+            }}
+        }}
 
-                showMessage(`خطا در به‌روزرسانی سفارش #${{orderId}}: ${{error.message}}`, 'error');
+        // Update single order
+        async function updateOrderPhone(index) {{
+            const order = ORDERS_DATA[index];
+            if (!order.guessed_phone || order.guessed_phone === 'N/A') {{
+                showMessage('خطا: شماره تلفن معتبر نیست', 'error');
+                return;
+            }}
+
+            if (await pushOrderPhone(order)) {{
+                showMessage(`سفارش #${{order.order_id}} با موفقیت به‌روزرسانی شد`, 'success');
+            }} else {{
+                showMessage(`خطا در به‌روزرسانی سفارش #${{order.order_id}}: ${{UPDATE_STATE[order.order_id].message}}`, 'error');
             }}
         }}
 
@@ -920,7 +2461,8 @@ def write_results(output_file: Path, results: List[Dict], format_type: str = 'js
             const highConfidenceOrders = ORDERS_DATA.filter(o =>
                 o.match_confidence === 'high' &&
                 o.guessed_phone &&
-                o.guessed_phone !== 'N/A'
+                o.guessed_phone !== 'N/A' &&
+                (UPDATE_STATE[o.order_id] || {{}}).status !== 'updated'
             );
 
             if (highConfidenceOrders.length === 0) {{
@@ -940,24 +2482,17 @@ def write_results(output_file: Path, results: List[Dict], format_type: str = 'js
             let errorCount = 0;
 
             for (let i = 0; i < highConfidenceOrders.length; i++) {{
-                const order = highConfidenceOrders[i];
-                const buttonElement = document.querySelector(`button[data-order-id="${{order.order_id}}"]`);
-
-                if (buttonElement && !buttonElement.disabled) {{
-                    await updateOrderPhone(order.order_id, order.guessed_phone, buttonElement);
-
-                    if (buttonElement.disabled && buttonElement.textContent.includes('✓')) {{
-                        successCount++;
-                    }} else {{
-                        errorCount++;
-                    }}
+                if (await pushOrderPhone(highConfidenceOrders[i])) {{
+                    successCount++;
+                }} else {{
+                    errorCount++;
+                }}
 
-                    // Update progress
-                    bulkButton.textContent = `در حال به‌روزرسانی... (${{i + 1}}/${{highConfidenceOrders.length}})`;
+                // Update progress
+                bulkButton.textContent = `در حال به‌روزرسانی... (${{i + 1}}/${{highConfidenceOrders.length}})`;
 
-                    // Small delay to avoid overwhelming the API
-                    await new Promise(resolve => setTimeout(resolve, 500));
-                }}
+                // Small delay to avoid overwhelming the API
+                await new Promise(resolve => setTimeout(resolve, 500));
             }}
 
             bulkButton.disabled = false;
@@ -983,16 +2518,21 @@ def write_results(output_file: Path, results: List[Dict], format_type: str = 'js
 
         // Update statistics
         function updateStats() {{
-            const updatedCount = document.querySelectorAll('.btn-update:disabled').length;
-            const totalCount = ORDERS_DATA.length;
-            const updatedStat = document.getElementById('stat-updated');
-            if (updatedStat) {{
-                updatedStat.textContent = updatedCount;
-            }}
+            const updatedCount = Object.values(UPDATE_STATE).filter(s => s.status === 'updated').length;
+            document.getElementById('stat-updated').textContent = updatedCount;
         }}
 
-        // Initialize on page load
+        // Initialize on page load: parse the embedded data, fill in the stats and render the first page
         document.addEventListener('DOMContentLoaded', function() {{
+            ORDERS_DATA = JSON.parse(document.getElementById('orders-data').textContent);
+
+            const highWithPhone = ORDERS_DATA.filter(o => o.match_confidence === 'high' && o.guessed_phone).length;
+            document.getElementById('stat-total').textContent = ORDERS_DATA.length;
+            document.getElementById('stat-phones').textContent = ORDERS_DATA.filter(o => o.guessed_phone).length;
+            document.getElementById('stat-high').textContent = ORDERS_DATA.filter(o => o.match_confidence === 'high').length;
+            document.getElementById('high-confidence-count').textContent = `${{highWithPhone}} سفارش با اطمینان بالا`;
+
+            renderPage();
             updateStats();
         }});
     </script>
@@ -1006,15 +2546,15 @@ def write_results(output_file: Path, results: List[Dict], format_type: str = 'js
 
         <div class="stats">
             <div class="stat-item">
-                <div class="stat-value">{len(results)}</div>
+                <div class="stat-value" id="stat-total">0</div>
                 <div class="stat-label">Total Orders</div>
             </div>
             <div class="stat-item">
-                <div class="stat-value">{sum(1 for r in results if r['guessed_phone'])}</div>
+                <div class="stat-value" id="stat-phones">0</div>
                 <div class="stat-label">With Guessed Phones</div>
             </div>
             <div class="stat-item">
-                <div class="stat-value">{sum(1 for r in results if r['match_confidence'] == 'high')}</div>
+                <div class="stat-value" id="stat-high">0</div>
                 <div class="stat-label">High Confidence</div>
             </div>
             <div class="stat-item">
@@ -1030,9 +2570,7 @@ def write_results(output_file: Path, results: List[Dict], format_type: str = 'js
                 <button id="btn-bulk-update" class="btn-bulk" onclick="updateBulkOrders()">
                     به‌روزرسانی دسته‌ای (اطمینان بالا)
                 </button>
-                <span style="color: #6c757d; font-size: 14px;">
-                    {sum(1 for r in results if r['match_confidence'] == 'high' and r['guessed_phone'])} سفارش با اطمینان بالا
-                </span>
+                <span id="high-confidence-count" style="color: #6c757d; font-size: 14px;"></span>
             </div>
         </div>
 
@@ -1055,58 +2593,193 @@ def write_results(output_file: Path, results: List[Dict], format_type: str = 'js
                         <th>Update Status</th>
                     </tr>
                 </thead>
-                <tbody>
-"""
-
-        for result in results:
-            confidence_class = f"confidence-{result['match_confidence']}"
-            phone_value = result['guessed_phone'] or 'N/A'
-            has_phone = phone_value != 'N/A'
-            button_disabled = '' if has_phone else 'disabled'
-
-            html_content += f"""
-                    <tr data-order-id="{result['order_id']}">
-                        <td class="order-id">{result['order_id']}</td>
-                        <td>{result['order_date']}</td>
-                        <td>{result['user_name']}</td>
-                        <td class="phone">{phone_value}</td>
-                        <td class="token">{result['snapppay_token']}</td>
-                        <td class="token">{result['transaction_id'] or ''}</td>
-                        <td><span class="{confidence_class}">{result['match_confidence'].upper()}</span></td>
-                        <td>{result['matching_orders_count']}</td>
-                        <td>{result['billing']['city']}</td>
-                        <td>{result['total']}</td>
-                        <td>{result['status']}</td>
-                        <td>
-                            <button
-                                class="btn-update"
-                                data-order-id="{result['order_id']}"
-                                onclick="updateOrderPhone({result['order_id']}, '{phone_value}', this)"
-                                {button_disabled}>
-                                به‌روزرسانی
-                            </button>
-                        </td>
-                        <td class="update-status"></td>
-                    </tr>
-"""
-
-        html_content += """
+                <tbody id="orders-body">
                 </tbody>
             </table>
         </div>
 
+        <div class="pagination">
+            <button class="btn-page" onclick="goToPage(currentPage - 1)">قبلی</button>
+            <span id="page-info"></span>
+            <button class="btn-page" onclick="goToPage(currentPage + 1)">بعدی</button>
+            <select onchange="setPageSize(this.value)">
+                <option value="50">50</option>
+                <option value="100" selected>100</option>
+                <option value="250">250</option>
+                <option value="500">500</option>
+            </select>
+        </div>
+
         <div class="footer">
             <p>Guessed Orders Data - Infinity Store | Click "به‌روزرسانی" to update phone numbers in WooCommerce</p>
         </div>
     </div>
-</body>
-</html>
 """
 
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+            f.write(html_head)
+            f.write('    <script type="application/json" id="orders-data">[')
+            for result in results:
+                f.write((',\n' if count else '\n') + embed_json(result))
+                count += 1
+            f.write('\n]</script>\n</body>\n</html>\n')
+
+        print(f"\n✅ Written {count} results to HTML: {output_file}")
+
+    return count
+
+def load_applied_order_ids(progress_file: Path) -> set:
+    """Read the apply progress log (JSON Lines) and return the order IDs already updated"""
+    applied_order_ids = set()
+    if not progress_file.exists():
+        return applied_order_ids
+    with open(progress_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partially written last line from an interrupted run
+            if entry.get('status') == 'updated':
+                applied_order_ids.add(entry.get('order_id'))
+    return applied_order_ids
+
+def apply_guessed_phones(wc_client: WooCommerceClient, results_file: Path, progress_file: Path,
+                         min_confidence: str = 'high', batch_size: int = WooCommerceClient.BATCH_SIZE_LIMIT,
+                         workers: int = 2, dry_run: bool = False) -> Dict:
+    """
+    Write guessed phone numbers back to WooCommerce through the orders batch endpoint
+
+    Results at or above min_confidence with a guessed phone are pushed in chunks of
+    batch_size, with up to `workers` batches in flight. Every order outcome is
+    appended to progress_file, and orders already recorded as updated there are
+    skipped, so an interrupted run can simply be started again.
+
+    Returns:
+        Counts: {'selected', 'skipped', 'updated', 'failed'}
+    """
+    print("📝 Applying guessed phone numbers to WooCommerce...")
+    print(f"   Results: {results_file}")
+    print(f"   Minimum confidence: {min_confidence}")
+    if dry_run:
+        print("   Dry run: no orders will be changed")
+    print()
 
-        print(f"\n✅ Written {len(results)} results to HTML: {output_file}")
+    with open(results_file, 'r', encoding='utf-8') as f:
+        results = json.load(f)
+
+    min_rank = CONFIDENCE_LEVELS.index(min_confidence)
+    selected = [
+        result for result in results
+        if result.get('guessed_phone') and CONFIDENCE_LEVELS.index(result.get('match_confidence', 'low')) >= min_rank
+    ]
+    applied_order_ids = load_applied_order_ids(progress_file)
+    pending = [result for result in selected if result.get('order_id') not in applied_order_ids]
+    stats = {'selected': len(selected), 'skipped': len(selected) - len(pending), 'updated': 0, 'failed': 0}
+
+    print(f"📊 {len(selected)} orders selected, {stats['skipped']} already applied, {len(pending)} to update")
+    if not pending:
+        return stats
+
+    batch_size = max(1, min(batch_size, WooCommerceClient.BATCH_SIZE_LIMIT))
+    chunks = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+
+    if dry_run:
+        for result in pending:
+            print(f"   [dry run] Order #{result['order_id']}: {result['guessed_phone']} ({result['match_confidence']})")
+        print(f"\n✅ Dry run: {len(pending)} orders would be updated in {len(chunks)} batch request(s)")
+        return stats
+
+    def push_chunk(chunk: List[Dict]) -> List[Dict]:
+        return wc_client.batch_update_orders([
+            {'id': result['order_id'], 'billing': {'phone': result['guessed_phone']}} for result in chunk
+        ])
+
+    with open(progress_file, 'a', encoding='utf-8') as progress_log, \
+            ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(push_chunk, chunk) for chunk in chunks]
+        try:
+            # Consume batches in order so the progress log is deterministic
+            for chunk_idx, (chunk, future) in enumerate(zip(chunks, futures), 1):
+                print(f"📦 Batch {chunk_idx}/{len(chunks)} ({len(chunk)} orders)...", end=' ')
+                try:
+                    responses = {item.get('id'): item for item in future.result()}
+                    batch_error = None
+                except Exception as e:
+                    responses = {}
+                    batch_error = str(e)
+
+                updated = 0
+                for result in chunk:
+                    item = responses.get(result['order_id'])
+                    if item is not None and not item.get('error'):
+                        status, error = 'updated', None
+                        updated += 1
+                    else:
+                        status = 'error'
+                        error = batch_error or (item or {}).get('error', {}).get('message', 'Missing from batch response')
+                    progress_log.write(json.dumps({
+                        'order_id': result['order_id'],
+                        'phone': result['guessed_phone'],
+                        'status': status,
+                        'error': error,
+                        'at': datetime.now().isoformat(timespec='seconds'),
+                    }, ensure_ascii=False) + '\n')
+                progress_log.flush()
+
+                stats['updated'] += updated
+                stats['failed'] += len(chunk) - updated
+                if batch_error:
+                    print(f"❌ {batch_error}")
+                else:
+                    print(f"✅ {updated} updated, {len(chunk) - updated} failed")
+        finally:
+            for future in futures:
+                future.cancel()
+
+    print(f"\n✅ Applied: {stats['updated']} updated, {stats['failed']} failed, {stats['skipped']} skipped")
+    return stats
+
+def get_cli_option(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Get the value of a `--name value` or `--name=value` command line option"""
+    args = sys.argv[1:]
+    for idx, arg in enumerate(args):
+        if arg == name and idx + 1 < len(args):
+            return args[idx + 1]
+        if arg.startswith(name + '='):
+            return arg.split('=', 1)[1]
+    return default
+
+def report_connection_stats(clients: List[WooCommerceClient]):
+    """Close the clients and print how well each source's connection pool was reused"""
+    for client in clients:
+        stats = client.close()
+        if not stats['requests']:
+            continue
+        reused_pct = stats['connections_reused'] / stats['requests'] * 100
+        print(f"🔌 {stats['source']}: {stats['connections_opened']} connections for {stats['requests']} requests "
+              f"({reused_pct:.0f}% reused, pool size {stats['pool_size']})")
+
+def report_metrics(json_file: Path, textfile: Optional[Path] = None):
+    """Write the run metrics and print the stage timings"""
+    try:
+        METRICS.write(json_file, textfile)
+    except OSError as e:
+        print(f"⚠️  Could not write metrics: {e}")
+        return
+
+    stages = METRICS.summary()['stages']
+    if stages:
+        print("\n⏱️  Stage timings:")
+        for stage, seconds in stages.items():
+            print(f"   {stage}: {seconds:.2f}s")
+    api_requests = METRICS.counter_value('wc_requests_total')
+    downloaded_mb = METRICS.counter_value('wc_downloaded_bytes_total') / (1024 * 1024)
+    print(f"   API requests: {int(api_requests)} ({downloaded_mb:.1f} MB, "
+          f"{int(METRICS.counter_value('wc_retries_total'))} retries)")
+    print(f"📈 Metrics written to {json_file.name}" + (f" and {textfile}" if textfile else ''))
 
 def main():
     import sys
@@ -1114,19 +2787,89 @@ def main():
     # Check for --clear-cache flag
     clear_cache = '--clear-cache' in sys.argv or '-c' in sys.argv
 
+    # Cache expiry: --cache-ttl-days N (names with matches), --negative-cache-ttl-hours N (names without)
+    cache_ttl = float(get_cli_option('--cache-ttl-days', '30')) * 24 * 3600
+    negative_cache_ttl = float(get_cli_option('--negative-cache-ttl-hours', '24')) * 3600
+
+    # Concurrency: --workers N (name searches in parallel), --source-concurrency N (in-flight requests per source)
+    workers = int(get_cli_option('--workers', '1'))
+    source_concurrency = int(get_cli_option('--source-concurrency', '4'))
+
+    # Fuzzy matching against the JSON index: --fuzzy, --fuzzy-min-score S (0-1, default 0.9)
+    fuzzy = '--fuzzy' in sys.argv
+    fuzzy_min_score = float(get_cli_option('--fuzzy-min-score', '0.9'))
+
+    # Throttling per source: --rate N (requests per second), --max-retries N
+    requests_per_second = float(get_cli_option('--rate', '5'))
+    max_retries = int(get_cli_option('--max-retries', '5'))
+
+    # Connections per source: --pool-size N (default: --source-concurrency), --no-keep-alive,
+    # --auth-mode both|basic|query (Basic auth header and/or consumer_key/secret query params)
+    pool_size = int(get_cli_option('--pool-size', '0')) or None
+    keep_alive = '--no-keep-alive' not in sys.argv
+    auth_mode = get_cli_option('--auth-mode', 'both').lower()
+    if auth_mode not in WooCommerceClient.AUTH_MODES:
+        print(f"⚠️  Invalid auth mode '{auth_mode}', using 'both'")
+        auth_mode = 'both'
+
+    # Step 1 paging: --page-workers N (parallel page fetches), --serial-pages (walk pages one by one)
+    page_workers = int(get_cli_option('--page-workers', '4'))
+    serial_pages = '--serial-pages' in sys.argv
+
+    # Apply mode: --apply pushes guessed phones from the results JSON back to WooCommerce
+    # (--min-confidence high|medium|low, --dry-run, --batch-size N, --apply-workers N)
+    apply_mode = '--apply' in sys.argv
+    dry_run = '--dry-run' in sys.argv
+    min_confidence = get_cli_option('--min-confidence', 'high').lower()
+    if min_confidence not in CONFIDENCE_LEVELS:
+        print(f"⚠️  Invalid confidence '{min_confidence}', using 'high'")
+        min_confidence = 'high'
+    batch_size = int(get_cli_option('--batch-size', str(WooCommerceClient.BATCH_SIZE_LIMIT)))
+    apply_workers = int(get_cli_option('--apply-workers', '2'))
+
+    # Bulk prefetch: --prefetch downloads every source's orders into a local snapshot once (later runs only
+    # fetch changes) and matches names against it instead of searching the API; --refresh-snapshot re-downloads
+    prefetch = '--prefetch' in sys.argv or '--refresh-snapshot' in sys.argv
+    refresh_snapshot = '--refresh-snapshot' in sys.argv
+
+    # Shared phones: --phone-fanout-threshold N flags guessed phones seen with more than N different names
+    phone_fanout_threshold = int(get_cli_option('--phone-fanout-threshold', str(PHONE_FANOUT_THRESHOLD)))
+
+    # Checkpointed matching: --resume skips names already recorded in the Step 2 journal
+    resume = '--resume' in sys.argv
+
+    # Run metrics: --metrics-json PATH (JSON summary), --metrics-textfile PATH (Prometheus textfile collector)
+    metrics_textfile = get_cli_option('--metrics-textfile')
+    metrics_textfile = Path(metrics_textfile) if metrics_textfile else None
+
+    # Incremental extraction: --full ignores the saved high-water mark and re-extracts the whole date range
+    full_extraction = '--full' in sys.argv
+
     # WooCommerce configuration (from woocommerce-importer/config.js)
     # Primary source
     WC_BASE_URL = 'https://infinitycolor.co'
     WC_CONSUMER_KEY = 'WOOCOMMERCE_CONSUMER_KEY'
     WC_CONSUMER_SECRET = 'WOOCOMMERCE_CONSUMER_SECRET'
 
+    # Client settings for the primary source (overrides the command line defaults), e.g. {'pool_size': 8}
+    WC_CLIENT_OPTIONS = {}
+
     # Backup sources for matching (add your backup URLs here)
-    # Format: (base_url, consumer_key, consumer_secret)
+    # Format: (base_url, consumer_key, consumer_secret) or (base_url, consumer_key, consumer_secret, options)
+    # where options overrides the client settings for that source,
+    # e.g. {'max_concurrent_requests': 2, 'pool_size': 2, 'auth_mode': 'query'}
     # These will be used ONLY for searching matches, not for extraction
     BACKUP_SOURCES = [
         ('https://pasdaranbookcity.ir/', 'ck_ab4e8240c3b7d9c38b4a557a97124d4450d497ff', 'cs_b23949f478cc40e25d23cce261d20da0e44f6199'),
     ]
 
+    # Local testing: --base-url URL points the primary source at another server (e.g. fake-woocommerce-server.py)
+    # and skips the backup sources
+    base_url_override = get_cli_option('--base-url')
+    if base_url_override:
+        WC_BASE_URL = base_url_override
+        BACKUP_SOURCES = []
+
     # Date range
     start_date = '2025-11-27T00:00:00'
     end_date = datetime.now().isoformat()
@@ -1134,22 +2877,67 @@ def main():
     # Output file
     script_dir = Path(__file__).parent
     output_file = script_dir / 'guessed-orders-with-phones.json'
-    cache_file = script_dir / 'name-search-cache.json'
-    json_orders_file = script_dir / 'woocommerce-guest-orders-snapppay-data.json'
+    cache_file = script_dir / 'name-search-cache.sqlite3'
+    legacy_cache_file = script_dir / 'name-search-cache.json'
+    # JSON export used for fast name matching: --json-orders PATH (.json array or .jsonl)
+    json_orders_file = Path(get_cli_option('--json-orders', str(script_dir / 'woocommerce-guest-orders-snapppay-data.json')))
+    state_file = script_dir / 'extraction-state.json'
+    extracted_orders_file = script_dir / 'orders-without-phones.json'
+    apply_progress_file = script_dir / 'phone-updates-progress.jsonl'
+    match_journal_file = script_dir / 'match-checkpoint.jsonl'
+    snapshot_file = script_dir / 'orders-snapshot.sqlite3'
+    metrics_file = Path(get_cli_option('--metrics-json', str(script_dir / 'run-metrics.json')))
 
     # Clear cache if requested
-    if clear_cache and cache_file.exists():
-        cache_file.unlink()
+    if clear_cache and (cache_file.exists() or legacy_cache_file.exists()):
+        for path in (cache_file, legacy_cache_file):
+            if path.exists():
+                path.unlink()
         print("🗑️  Cache cleared")
         print()
 
+    # Client settings shared by every source (per-source options are merged on top)
+    client_settings = {
+        'max_concurrent_requests': source_concurrency,
+        'requests_per_second': requests_per_second,
+        'max_retries': max_retries,
+        'pool_size': pool_size,
+        'keep_alive': keep_alive,
+        'auth_mode': auth_mode,
+    }
+
+    # One-time import of the old JSON cache
+    migrate_json_name_cache(legacy_cache_file, cache_file)
+
+    # Apply guessed phones from a previous run instead of extracting and matching
+    if apply_mode:
+        apply_client = WooCommerceClient(WC_BASE_URL, WC_CONSUMER_KEY, WC_CONSUMER_SECRET,
+                                         **{**client_settings, **WC_CLIENT_OPTIONS})
+        try:
+            with METRICS.timer('apply'):
+                apply_guessed_phones(apply_client, output_file, apply_progress_file, min_confidence, batch_size,
+                                     apply_workers, dry_run)
+        except KeyboardInterrupt:
+            print("\n\n⚠️  Interrupted by user (progress saved, run again to resume)")
+            sys.exit(1)
+        finally:
+            report_connection_stats([apply_client])
+            report_metrics(metrics_file, metrics_textfile)
+        return
+
     # Load orders from JSON file for fast name matching (optional, for faster matching)
     print("📂 Loading orders from JSON file for fast name matching...", end=' ')
-    json_orders = load_orders_from_json(json_orders_file)
-    if json_orders:
-        print(f"✅ Loaded {len(json_orders)} orders for name matching")
+    phone_index = {}
+    with METRICS.timer('load_json_index'):
+        name_index, json_order_count = load_name_index_from_json(json_orders_file, phone_index)
+    if json_order_count:
+        print(f"✅ Loaded {json_order_count} orders for name matching ({len(name_index)} names, {len(phone_index)} phones)")
     else:
         print("⚠️  JSON file not found or empty, will use API only for matching")
+    fuzzy_matcher = None
+    if fuzzy and name_index:
+        fuzzy_matcher = FuzzyNameMatcher(name_index.keys(), fuzzy_min_score)
+        print(f"🔤 Fuzzy name matching enabled (min score {fuzzy_min_score})")
     print()
 
     print("🚀 WooCommerce Order Phone Number Matcher")
@@ -1159,13 +2947,15 @@ def main():
     print()
 
     # Initialize primary WooCommerce client (for extraction)
-    primary_client = WooCommerceClient(WC_BASE_URL, WC_CONSUMER_KEY, WC_CONSUMER_SECRET)
+    primary_client = WooCommerceClient(WC_BASE_URL, WC_CONSUMER_KEY, WC_CONSUMER_SECRET,
+                                       **{**client_settings, **WC_CLIENT_OPTIONS})
 
     # Initialize backup clients for matching
     matching_clients = [primary_client]  # Always include primary
-    for backup_url, backup_key, backup_secret in BACKUP_SOURCES:
+    for backup_url, backup_key, backup_secret, *backup_options in BACKUP_SOURCES:
         try:
-            backup_client = WooCommerceClient(backup_url, backup_key, backup_secret)
+            backup_client = WooCommerceClient(backup_url, backup_key, backup_secret,
+                                              **{**client_settings, **(backup_options[0] if backup_options else {})})
             matching_clients.append(backup_client)
             print(f"✅ Added backup source: {backup_url}")
         except Exception as e:
@@ -1175,44 +2965,108 @@ def main():
         print(f"📊 Will search across {len(matching_clients)} sources for phone number matches")
     print()
 
+    snapshot = None
     try:
         # Step 1: Extract orders without phone numbers from WooCommerce API
-        orders_without_phone = extract_orders_without_phones(primary_client, start_date, end_date)
+        # (only orders changed since the last run if a previous state exists for the same start date)
+        state, previous_orders = ({}, []) if full_extraction else load_extraction_state(state_file, extracted_orders_file)
+        high_water_mark = dict(state.get('high_water_mark') or {})
+        modified_after = high_water_mark.get('date_modified') or high_water_mark.get('date_created')
+
+        with METRICS.timer('extract'):
+            if state.get('start_date') == start_date and modified_after:
+                print(f"♻️  Incremental run: {len(previous_orders)} orders from previous run, fetching changes since {modified_after}")
+                changed_orders = extract_changed_orders(primary_client, modified_after, page_workers, serial_pages,
+                                                        high_water_mark)
+                orders_without_phone = merge_changed_orders(previous_orders, changed_orders, start_date)
+                print(f"   Merged: {len(orders_without_phone)} orders without phone numbers")
+            else:
+                high_water_mark = {}
+                orders_without_phone = extract_orders_without_phones(primary_client, start_date, end_date,
+                                                                     page_workers, serial_pages, high_water_mark)
+        METRICS.inc('orders_without_phone_total', len(orders_without_phone))
+
+        save_extraction_state(state_file, extracted_orders_file, {
+            'start_date': start_date,
+            'high_water_mark': high_water_mark,
+            'updated_at': datetime.now().isoformat(),
+        }, orders_without_phone)
 
         if not orders_without_phone:
             print("\n⚠️  No orders without phone numbers found")
             return
 
-        # Step 2: Match phone numbers by searching for orders with same names (search JSON first, then API)
-        guessed_results = match_phone_numbers(matching_clients, orders_without_phone, start_date, end_date, cache_file, json_orders)
-
-        if not guessed_results:
+        # Prefetch: bring the local order snapshot of every source up to date before matching
+        if prefetch:
+            print("\n📦 Prefetching orders from all sources into the local snapshot...")
+            snapshot = OrderSnapshot(snapshot_file)
+            with METRICS.timer('prefetch'):
+                snapshot.sync(matching_clients, page_workers, serial_pages, refresh_snapshot)
+            print(f"✅ Snapshot holds {snapshot.count_orders()} orders with phones from {len(snapshot.sources)} source(s)")
+
+        # Step 2: Match phone numbers by searching for orders with same names (search JSON first, then API
+        # or the prefetched snapshot)
+        # Rows are streamed to JSONL and CSV as each name finishes, so partial output survives an interrupt;
+        # only the summary counts and the first row are kept in memory
+        summary = {'total': 0, 'high': 0, 'medium': 0, 'with_phone': 0, 'shared_phone': 0, 'sample': None}
+        results_jsonl_file = script_dir / 'guessed-orders-with-phones.jsonl'
+        with METRICS.timer('match'), \
+                JsonLinesSink(results_jsonl_file, flush=True) as jsonl_sink, \
+                CsvSink(script_dir / 'guessed-orders-with-phones.csv', RESULT_CSV_FIELDS, flatten_result,
+                        flush=True) as csv_sink:
+            def stream_result(result: Dict):
+                jsonl_sink.write(result)
+                csv_sink.write(result)
+                summary['total'] += 1
+                if result['match_confidence'] in ('high', 'medium'):
+                    summary[result['match_confidence']] += 1
+                if result['guessed_phone']:
+                    summary['with_phone'] += 1
+                if result['shared_phone']:
+                    summary['shared_phone'] += 1
+                if summary['sample'] is None:
+                    summary['sample'] = result
+
+            try:
+                match_phone_numbers(matching_clients, orders_without_phone, start_date, end_date,
+                                    cache_file=cache_file, name_index=name_index, workers=workers,
+                                    cache_ttl=cache_ttl, negative_cache_ttl=negative_cache_ttl,
+                                    fuzzy_matcher=fuzzy_matcher, journal_file=match_journal_file, resume=resume,
+                                    on_result=stream_result, snapshot=snapshot, phone_index=phone_index,
+                                    phone_fanout_threshold=phone_fanout_threshold)
+            finally:
+                METRICS.inc('rows_written_total', jsonl_sink.count, format='jsonl')
+                METRICS.inc('rows_written_total', csv_sink.count, format='csv')
+        print(f"\n✅ Streamed {jsonl_sink.count} results to {jsonl_sink.output_file.name} and {csv_sink.output_file.name}")
+
+        if not summary['total']:
             print("\n⚠️  No phone number matches found")
             return
 
-        # Step 3: Write results
-        write_results(output_file, guessed_results, 'json')
+        # Step 3: Write results, streamed back from the JSON Lines output one row at a time
+        write_results(output_file, iter_json_records(results_jsonl_file), 'json')
 
         # Also write Excel and HTML if available
         if HAS_OPENPYXL:
             excel_file = script_dir / 'guessed-orders-with-phones.xlsx'
-            write_results(excel_file, guessed_results, 'xlsx')
+            write_results(excel_file, iter_json_records(results_jsonl_file), 'xlsx')
 
         html_file = script_dir / 'guessed-orders-with-phones.html'
-        write_results(html_file, guessed_results, 'html')
+        write_results(html_file, iter_json_records(results_jsonl_file), 'html')
 
         # Print summary
         print("\n📊 Summary:")
         print(f"   Orders without phones: {len(orders_without_phone)}")
-        print(f"   Orders with guessed phones: {len(guessed_results)}")
-        print(f"   High confidence matches: {sum(1 for r in guessed_results if r['match_confidence'] == 'high')}")
-        print(f"   Medium confidence matches: {sum(1 for r in guessed_results if r['match_confidence'] == 'medium')}")
-        print(f"   Orders with phone numbers: {sum(1 for r in guessed_results if r['guessed_phone'])}")
+        print(f"   Orders with guessed phones: {summary['total']}")
+        print(f"   High confidence matches: {summary['high']}")
+        print(f"   Medium confidence matches: {summary['medium']}")
+        print(f"   Orders with phone numbers: {summary['with_phone']}")
+        print(f"   Orders with shared phones (confidence lowered): {summary['shared_phone']}")
 
         # Print sample
-        if guessed_results:
+        if summary['sample']:
             print("\n📋 Sample result:")
-            sample = guessed_results[0]
+            sample = summary['sample']
             print(f"   Order ID: {sample['order_id']}")
             print(f"   User Name: {sample['user_name']}")
             print(f"   Guessed Phone: {sample['guessed_phone']}")
@@ -1220,13 +3074,18 @@ def main():
             print(f"   Matching Orders: {sample['matching_orders_count']}")
 
     except KeyboardInterrupt:
-        print("\n\n⚠️  Interrupted by user")
+        print("\n\n⚠️  Interrupted by user (run again with --resume to continue matching)")
         sys.exit(1)
     except Exception as e:
         print(f"\n❌ Fatal error: {e}")
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if snapshot is not None:
+            snapshot.close()
+        report_connection_stats(matching_clients)
+        report_metrics(metrics_file, metrics_textfile)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Local WooCommerce REST Stand-in Server
+
+Serves the /wp-json/wc/v3/orders endpoints used by extract-and-match-orders.py
+from an in-memory order store, so extraction, matching and phone write-back can
+be exercised and benchmarked without touching the production stores:
+- GET  /wp-json/wc/v3/orders          (search, after/before, modified_after, payment_method,
+                                        status, orderby/order, per_page/page, _fields,
+                                        X-WP-Total / X-WP-TotalPages headers)
+- GET  /wp-json/wc/v3/orders/<id>
+- PUT  /wp-json/wc/v3/orders/<id>     (POST is accepted too)
+- POST /wp-json/wc/v3/orders/batch    (create / update / delete, at most 100 items)
+
+Orders are seeded from the SnappPay JSON export or generated synthetically, with
+configurable latency and error injection (500/503 and 429 with Retry-After).
+
+Usage:
+    python fake-woocommerce-server.py [--port 8787] [--seed-json FILE | --synthetic N]
+        [--phone-ratio 0.6] [--random-seed N] [--latency-ms 0] [--jitter-ms 0]
+        [--error-rate 0] [--throttle-rate 0] [--retry-after 1] [--quiet]
+
+Then point the extractor at it:
+    python extract-and-match-orders.py --base-url http://127.0.0.1:8787
+"""
+
+import json
+import sys
+import time
+import random
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+API_PREFIX = '/wp-json/wc/v3/orders'
+MAX_PER_PAGE = 100
+BATCH_SIZE_LIMIT = 100
+
+SNAPPPAY_METHOD = 'WC_Gateway_SnappPay'
+SNAPPPAY_TITLE = 'پرداخت اقساطیِ اسنپ پی'
+
+FIRST_NAMES = ['علی', 'محمد', 'حسین', 'رضا', 'مهدی', 'امیر', 'سارا', 'مریم', 'زهرا', 'فاطمه',
+               'نرگس', 'زهره', 'سمیرا', 'الهام', 'نگین', 'محمدرضا', 'امیرحسین', 'یاسمن', 'کیان', 'آرش']
+LAST_NAMES = ['محمدی', 'حسینی', 'رضایی', 'احمدی', 'کریمی', 'موسوی', 'جعفری', 'صادقی', 'نوشادی', 'ابوالقاسم',
+              'قاسمی', 'عباسی', 'رحیمی', 'نوری', 'کاظمی', 'هاشمی', 'یزدانی', 'شریفی', 'طاهری', 'اکبری']
+CITIES = ['تهران', 'اصفهان', 'شیراز', 'مشهد', 'تبریز', 'کرج', 'قم', 'رشت']
+STATUSES = ['processing', 'completed', 'on-hold', 'cancelled']
+
+def get_cli_option(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Read `--name value` or `--name=value` from the command line"""
+    args = sys.argv[1:]
+    for idx, arg in enumerate(args):
+        if arg == name and idx + 1 < len(args):
+            return args[idx + 1]
+        if arg.startswith(name + '='):
+            return arg.split('=', 1)[1]
+    return default
+
+def make_order(order_id: int, first_name: str, last_name: str, phone: str, city: str, date_created: str,
+               status: str, payment_method: str, total: str, token: str = '', transaction_id: str = '') -> Dict:
+    """Build an order in WooCommerce REST API format"""
+    meta_data = []
+    if token:
+        meta_data.append({'id': order_id * 10 + 1, 'key': '_order_spp_token', 'value': token})
+    if transaction_id:
+        meta_data.append({'id': order_id * 10 + 2, 'key': '_transactionId', 'value': transaction_id})
+
+    return {
+        'id': order_id,
+        'status': status,
+        'date_created': date_created,
+        'date_modified': date_created,
+        'total': total,
+        'payment_method': payment_method,
+        'payment_method_title': SNAPPPAY_TITLE if payment_method == SNAPPPAY_METHOD else 'پرداخت آنلاین',
+        'billing': {
+            'first_name': first_name,
+            'last_name': last_name,
+            'phone': phone,
+            'email': '',
+            'city': city,
+            'country': 'IR',
+        },
+        'shipping': {
+            'first_name': first_name,
+            'last_name': last_name,
+            'city': city,
+            'country': 'IR',
+        },
+        'meta_data': meta_data,
+    }
+
+def orders_from_export(json_file: Path) -> List[Dict]:
+    """Convert the SnappPay JSON export (woocommerce-guest-orders-snapppay-data.json) to API orders"""
+    with open(json_file, 'r', encoding='utf-8') as f:
+        exported = json.load(f)
+
+    orders = []
+    for item in exported:
+        billing = item.get('billing', {})
+        order = make_order(
+            item.get('orderId'),
+            billing.get('first_name', ''),
+            billing.get('last_name', ''),
+            billing.get('phone', ''),
+            billing.get('city', ''),
+            item.get('orderDate', ''),
+            item.get('status', 'processing'),
+            item.get('payment_method', SNAPPPAY_METHOD),
+            item.get('total', ''),
+            item.get('snappPayToken', ''),
+            item.get('transactionId', ''),
+        )
+        shipping = item.get('shipping', {})
+        order['shipping'].update({key: shipping[key] for key in order['shipping'] if key in shipping})
+        orders.append(order)
+    return orders
+
+def iter_generated_orders(count: int, phone_ratio: float = 0.6, seed: int = 42,
+                          start: datetime = datetime(2025, 11, 27)) -> Iterator[Dict]:
+    """
+    Generate synthetic Persian orders one at a time
+
+    Customers are drawn from a pool of about count / 3 names, so most names repeat
+    across orders; phone_ratio of the orders carry a billing phone (one phone per
+    customer) and SnappPay orders get a token and transaction ID.
+    """
+    rnd = random.Random(seed)
+    customers = []
+    for idx in range(max(1, count // 3)):
+        customers.append((
+            rnd.choice(FIRST_NAMES),
+            rnd.choice(LAST_NAMES),
+            f"09{rnd.randint(100000000, 999999999)}",
+            rnd.choice(CITIES),
+        ))
+
+    start_timestamp = int(time.mktime(start.timetuple()))
+    for idx in range(count):
+        first_name, last_name, phone, city = rnd.choice(customers)
+        order_id = 1000000 + idx
+        date_created = (start + timedelta(minutes=7 * idx)).isoformat(timespec='seconds')
+        snapppay = rnd.random() < 0.7
+        yield make_order(
+            order_id,
+            first_name,
+            last_name,
+            phone if rnd.random() < phone_ratio else '',
+            city,
+            date_created,
+            rnd.choice(STATUSES[:2]) if rnd.random() < 0.9 else rnd.choice(STATUSES[2:]),
+            SNAPPPAY_METHOD if snapppay else 'bacs',
+            str(rnd.randint(50, 5000) * 1000),
+            f"{rnd.getrandbits(128):032x}" if snapppay else '',
+            f"{start_timestamp + idx}-{order_id}" if snapppay else '',
+        )
+
+def generate_orders(count: int, phone_ratio: float = 0.6, seed: int = 42,
+                    start: datetime = datetime(2025, 11, 27)) -> List[Dict]:
+    """Generate synthetic Persian orders (see iter_generated_orders)"""
+    return list(iter_generated_orders(count, phone_ratio, seed, start))
+
+class OrderStore:
+    """Thread-safe in-memory order store implementing the WooCommerce orders query semantics"""
+
+    def __init__(self, orders: List[Dict]):
+        self._lock = threading.Lock()
+        self._orders = {order['id']: order for order in orders}
+        self._next_id = max(self._orders, default=0) + 1
+
+    def __len__(self):
+        return len(self._orders)
+
+    @staticmethod
+    def _matches_search(order: Dict, term: str) -> bool:
+        term = ' '.join(term.split()).lower()
+        billing = order.get('billing', {})
+        shipping = order.get('shipping', {})
+        haystacks = [
+            f"{billing.get('first_name', '')} {billing.get('last_name', '')}",
+            f"{shipping.get('first_name', '')} {shipping.get('last_name', '')}",
+            billing.get('email', ''),
+            billing.get('phone', ''),
+            str(order.get('id')),
+        ]
+        return any(term in ' '.join(haystack.split()).lower() for haystack in haystacks)
+
+    def query(self, params: Dict[str, str]) -> tuple:
+        """Filter, sort and paginate orders; returns (page_orders, total, total_pages)"""
+        with self._lock:
+            orders = list(self._orders.values())
+
+        if params.get('search'):
+            orders = [order for order in orders if self._matches_search(order, params['search'])]
+        if params.get('after'):
+            orders = [order for order in orders if order['date_created'] > params['after']]
+        if params.get('before'):
+            orders = [order for order in orders if order['date_created'] < params['before']]
+        if params.get('modified_after'):
+            orders = [order for order in orders if order['date_modified'] > params['modified_after']]
+        if params.get('payment_method'):
+            orders = [order for order in orders if order.get('payment_method') == params['payment_method']]
+        if params.get('status') and params['status'] != 'any':
+            statuses = set(params['status'].split(','))
+            orders = [order for order in orders if order.get('status') in statuses]
+
+        sort_key = {'id': 'id', 'modified': 'date_modified'}.get(params.get('orderby', 'date'), 'date_created')
+        orders.sort(key=lambda order: (order[sort_key], order['id']), reverse=params.get('order', 'desc') == 'desc')
+
+        per_page = min(max(int(params.get('per_page', 10)), 1), MAX_PER_PAGE)
+        page = max(int(params.get('page', 1)), 1)
+        total = len(orders)
+        total_pages = (total + per_page - 1) // per_page
+        return orders[(page - 1) * per_page:page * per_page], total, total_pages
+
+    def get(self, order_id: int) -> Optional[Dict]:
+        with self._lock:
+            return self._orders.get(order_id)
+
+    def update(self, order_id: int, changes: Dict) -> Optional[Dict]:
+        """Apply a partial update (nested dicts such as billing are merged)"""
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is None:
+                return None
+            for key, value in changes.items():
+                if key == 'id':
+                    continue
+                if isinstance(value, dict) and isinstance(order.get(key), dict):
+                    order[key].update(value)
+                else:
+                    order[key] = value
+            order['date_modified'] = datetime.now().isoformat(timespec='seconds')
+            return order
+
+    def create(self, data: Dict) -> Dict:
+        with self._lock:
+            order_id = self._next_id
+            self._next_id += 1
+            now = datetime.now().isoformat(timespec='seconds')
+            order = make_order(order_id, '', '', '', '', now, 'pending', '', '0')
+            self._orders[order_id] = order
+        return self.update(order_id, data)
+
+    def delete(self, order_id: int) -> Optional[Dict]:
+        with self._lock:
+            return self._orders.pop(order_id, None)
+
+def select_fields(order: Dict, fields: Optional[List[str]]) -> Dict:
+    """Apply the `_fields` query parameter (top-level fields only)"""
+    if not fields:
+        return order
+    return {key: value for key, value in order.items() if key in fields}
+
+def not_found_error(order_id) -> Dict:
+    return {'code': 'woocommerce_rest_shop_order_invalid_id', 'message': 'Invalid ID.', 'data': {'status': 404},
+            'id': order_id}
+
+class FakeWooCommerceHandler(BaseHTTPRequestHandler):
+    """Request handler; configuration lives on the server (see make_server)"""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in two writes; with Nagle on, the body waits for the client's
+    # delayed ACK (~40 ms) on every keep-alive response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body, headers: Optional[Dict[str, str]] = None):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if self.close_connection:
+            # Tell the client, like real web servers do, so it never reuses the closed socket
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length).decode('utf-8'))
+
+    def _inject_faults(self) -> bool:
+        """Sleep for the configured latency and maybe answer with an injected error; True if handled"""
+        server = self.server
+        delay = server.latency + server.rnd.uniform(0, server.jitter) if server.jitter else server.latency
+        if delay:
+            time.sleep(delay)
+
+        roll = server.rnd.random()
+        if roll < server.throttle_rate:
+            self._send_json(429, {'code': 'rest_too_many_requests', 'message': 'Too many requests',
+                                  'data': {'status': 429}}, {'Retry-After': str(server.retry_after)})
+            return True
+        if roll < server.throttle_rate + server.error_rate:
+            status = server.rnd.choice([500, 503])
+            self._send_json(status, {'code': 'internal_server_error', 'message': 'Injected failure',
+                                     'data': {'status': status}})
+            return True
+        return False
+
+    def _route(self) -> tuple:
+        """Split the request path into (query params, order path part)"""
+        parsed = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        if not parsed.path.rstrip('/').startswith(API_PREFIX):
+            return params, None
+        return params, parsed.path.rstrip('/')[len(API_PREFIX):].lstrip('/')
+
+    def do_GET(self):
+        params, sub_path = self._route()
+        if sub_path is None:
+            self._send_json(404, {'code': 'rest_no_route', 'message': 'No route was found', 'data': {'status': 404}})
+            return
+        if self._inject_faults():
+            return
+
+        fields = params['_fields'].split(',') if params.get('_fields') else None
+        if not sub_path:
+            orders, total, total_pages = self.server.store.query(params)
+            self._send_json(200, [select_fields(order, fields) for order in orders],
+                            {'X-WP-Total': str(total), 'X-WP-TotalPages': str(total_pages)})
+            return
+
+        order = self.server.store.get(int(sub_path)) if sub_path.isdigit() else None
+        if order is None:
+            self._send_json(404, not_found_error(sub_path))
+            return
+        self._send_json(200, select_fields(order, fields))
+
+    def do_PUT(self):
+        params, sub_path = self._route()
+        body = self._read_json()
+        if sub_path is None or not sub_path.isdigit():
+            self._send_json(404, {'code': 'rest_no_route', 'message': 'No route was found', 'data': {'status': 404}})
+            return
+        if self._inject_faults():
+            return
+
+        order = self.server.store.update(int(sub_path), body)
+        if order is None:
+            self._send_json(404, not_found_error(int(sub_path)))
+            return
+        self._send_json(200, order)
+
+    def do_POST(self):
+        params, sub_path = self._route()
+        if sub_path != 'batch':
+            self.do_PUT()
+            return
+        body = self._read_json()
+        if self._inject_faults():
+            return
+
+        store = self.server.store
+        item_count = sum(len(body.get(action, [])) for action in ('create', 'update', 'delete'))
+        if item_count > BATCH_SIZE_LIMIT:
+            self._send_json(413, {'code': 'woocommerce_rest_request_entity_too_large',
+                                  'message': f'Unable to accept more than {BATCH_SIZE_LIMIT} items for this request.',
+                                  'data': {'status': 413}})
+            return
+
+        response = {}
+        if 'create' in body:
+            response['create'] = [store.create(item) for item in body['create']]
+        if 'update' in body:
+            response['update'] = [
+                store.update(item.get('id'), item) or not_found_error(item.get('id')) for item in body['update']
+            ]
+        if 'delete' in body:
+            response['delete'] = [store.delete(order_id) or not_found_error(order_id) for order_id in body['delete']]
+        self._send_json(200, response)
+
+def make_server(store: OrderStore, port: int = 8787, host: str = '127.0.0.1', latency: float = 0.0,
+                jitter: float = 0.0, error_rate: float = 0.0, throttle_rate: float = 0.0, retry_after: int = 1,
+                quiet: bool = False, seed: int = 42) -> ThreadingHTTPServer:
+    """Create (but don't start) a fake WooCommerce server; port 0 picks a free port"""
+    server = ThreadingHTTPServer((host, port), FakeWooCommerceHandler)
+    server.daemon_threads = True
+    server.store = store
+    server.latency = latency
+    server.jitter = jitter
+    server.error_rate = error_rate
+    server.throttle_rate = throttle_rate
+    server.retry_after = retry_after
+    server.quiet = quiet
+    server.rnd = random.Random(seed)
+    return server
+
+def main():
+    script_dir = Path(__file__).parent
+    port = int(get_cli_option('--port', '8787'))
+    random_seed = int(get_cli_option('--random-seed', '42'))
+    synthetic_count = get_cli_option('--synthetic')
+    seed_json = Path(get_cli_option('--seed-json', str(script_dir / 'woocommerce-guest-orders-snapppay-data.json')))
+
+    if synthetic_count:
+        orders = generate_orders(int(synthetic_count), float(get_cli_option('--phone-ratio', '0.6')), random_seed)
+        source = f"{synthetic_count} synthetic orders"
+    elif seed_json.exists():
+        orders = orders_from_export(seed_json)
+        source = str(seed_json)
+    else:
+        print(f"❌ Error: Seed file not found: {seed_json} (use --synthetic N for generated data)")
+        sys.exit(1)
+
+    server = make_server(
+        OrderStore(orders),
+        port,
+        get_cli_option('--host', '127.0.0.1'),
+        float(get_cli_option('--latency-ms', '0')) / 1000,
+        float(get_cli_option('--jitter-ms', '0')) / 1000,
+        float(get_cli_option('--error-rate', '0')),
+        float(get_cli_option('--throttle-rate', '0')),
+        int(get_cli_option('--retry-after', '1')),
+        '--quiet' in sys.argv,
+        random_seed,
+    )
+
+    host, port = server.server_address[:2]
+    print("🚀 Fake WooCommerce server")
+    print("=" * 60)
+    print(f"📦 Orders: {len(server.store)} ({source})")
+    print(f"🌐 Listening on http://{host}:{port}{API_PREFIX}")
+    print(f"⏱️  Latency: {server.latency * 1000:.0f}ms (+{server.jitter * 1000:.0f}ms jitter), "
+          f"errors: {server.error_rate:.0%}, throttled: {server.throttle_rate:.0%}")
+    print()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
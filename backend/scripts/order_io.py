@@ -0,0 +1,167 @@
+"""
+Streaming Order I/O Shared by the Order Scripts
+
+Used by extract-and-match-orders.py and parse-snapppay-orders.py:
+- iter_json_array / iter_json_lines / iter_json_records: read JSON exports one record at a time
+- JsonLinesSink / CsvSink: write rows to JSON Lines / CSV as they are produced
+- embed_json: serialize data for a <script type="application/json"> block in HTML reports
+"""
+
+import csv
+import json
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+def iter_json_array(f, chunk_size: int = 1 << 16) -> Iterator:
+    """
+    Yield the elements of a top-level JSON array one at a time
+
+    Reads the file in chunks and decodes one element at a time, so only the
+    current element (plus one chunk) is held in memory. Raises ValueError for
+    input that is not a well-formed array (e.g. '[1,,2]', '[,1]' or '[1,]').
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill(buffer: str, pos: int) -> tuple:
+        chunk = f.read(chunk_size)
+        return buffer[pos:] + chunk, 0, not chunk
+
+    # 'start': before '[', 'first': after '[', 'value': after ',', 'separator': after an element
+    state = 'start'
+    while True:
+        # Skip whitespace, reading more input as needed
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                raise ValueError('Unexpected end of JSON array')
+            buffer, pos, eof = fill(buffer, pos)
+            continue
+
+        char = buffer[pos]
+        if state == 'start':
+            if char != '[':
+                raise ValueError('Expected a top-level JSON array')
+            pos += 1
+            state = 'first'
+            continue
+
+        if state == 'separator':
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError('Expected "," or "]" after array element')
+            pos += 1
+            state = 'value'
+            continue
+
+        if char == ']' and state == 'first':
+            return
+        if char in ',]':
+            raise ValueError(f'Expected a value before "{char}" in JSON array')
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            buffer, pos, eof = fill(buffer, pos)
+            continue
+
+        # A value must be followed by ',' or ']'; otherwise it may be truncated at the
+        # buffer edge (e.g. a number), so read more and decode it again
+        next_pos = end
+        while next_pos < len(buffer) and buffer[next_pos].isspace():
+            next_pos += 1
+        if next_pos >= len(buffer) or buffer[next_pos] not in ',]':
+            if eof:
+                raise ValueError('Expected "," or "]" after array element')
+            buffer, pos, eof = fill(buffer, pos)
+            continue
+
+        yield item
+        pos = end
+        state = 'separator'
+
+def iter_json_lines(f) -> Iterator:
+    """Yield one JSON value per non-empty line (JSON Lines)"""
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+def iter_json_records(json_file) -> Iterator:
+    """Stream records from a JSON array file, or a JSON Lines file (.jsonl/.ndjson)"""
+    with open(json_file, 'r', encoding='utf-8') as f:
+        if Path(json_file).suffix.lower() in ('.jsonl', '.ndjson'):
+            yield from iter_json_lines(f)
+        else:
+            yield from iter_json_array(f)
+
+class JsonLinesSink:
+    """
+    Write rows to a JSON Lines file as they are produced (one object per line)
+
+    With flush=True every row is flushed, so the file survives an interrupt.
+    """
+
+    def __init__(self, output_file: Path, flush: bool = False):
+        self.output_file = output_file
+        self.count = 0
+        self._flush = flush
+        self._file = open(output_file, 'w', encoding='utf-8')
+
+    def write(self, row: Dict):
+        self._file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        if self._flush:
+            self._file.flush()
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class CsvSink:
+    """
+    Write rows to a CSV file as they are produced
+
+    Rows are mapped to `fieldnames` columns by `flatten` if given. With
+    flush=True every row is flushed, so the file survives an interrupt.
+    """
+
+    def __init__(self, output_file: Path, fieldnames: List[str], flatten: Optional[Callable[[Dict], Dict]] = None,
+                 flush: bool = False):
+        self.output_file = output_file
+        self.count = 0
+        self._flatten = flatten
+        self._flush = flush
+        self._file = open(output_file, 'w', newline='', encoding='utf-8-sig')
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames)
+        self._writer.writeheader()
+
+    def write(self, row: Dict):
+        self._writer.writerow(self._flatten(row) if self._flatten else row)
+        if self._flush:
+            self._file.flush()
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def embed_json(value) -> str:
+    """Serialize a value for a <script type="application/json"> block (no raw '<' that could end the tag)"""
+    return json.dumps(value, ensure_ascii=False).replace('<', '\\u003c')
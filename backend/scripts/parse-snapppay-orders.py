@@ -11,86 +11,102 @@ payment information and outputs a formatted file with:
 - Transaction ID
 """
 
+import os
 import json
-import csv
 import sys
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from pathlib import Path
 from datetime import datetime
 
+from order_io import CsvSink, JsonLinesSink, embed_json, iter_json_records
+
 # Try to import optional libraries
 try:
     from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.formatting.rule import FormulaRule
     from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
     from openpyxl.utils import get_column_letter
     HAS_OPENPYXL = True
 except ImportError:
     HAS_OPENPYXL = False
 
-def parse_orders(input_file, output_format='csv'):
+def parse_order(order):
+    """Extract the required fields from one exported order"""
+    return {
+        'first_name': order.get('billing', {}).get('first_name', '') or
+                     order.get('shipping', {}).get('first_name', ''),
+        'last_name': order.get('billing', {}).get('last_name', '') or
+                    order.get('shipping', {}).get('last_name', ''),
+        'order_id': order.get('orderId', ''),
+        'snapp_pay_token': order.get('snappPayToken', ''),
+        'transaction_id': order.get('transactionId', '') or '',
+    }
+
+def iter_parsed_orders(input_file):
     """
-    Parse orders from JSON file and extract required information.
-
-    Args:
-        input_file: Path to input JSON file
-        output_format: Output format ('csv', 'json', 'txt')
+    Incrementally parse orders from a JSON array or JSON Lines (.jsonl) file.
 
-    Returns:
-        List of parsed order dictionaries
+    Yields parsed order dictionaries one at a time; the input is never fully
+    loaded into memory.
     """
-    # Read input JSON file
-    try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            orders = json.load(f)
-    except FileNotFoundError:
-        print(f"❌ Error: File not found: {input_file}")
-        sys.exit(1)
-    except json.JSONDecodeError as e:
-        print(f"❌ Error: Invalid JSON file: {e}")
-        sys.exit(1)
+    for order in iter_json_records(input_file):
+        yield parse_order(order)
 
-    print(f"📊 Found {len(orders)} orders in input file")
+FIELDNAMES = ['first_name', 'last_name', 'order_id', 'snapp_pay_token', 'transaction_id']
 
-    # Parse and extract required fields
-    parsed_orders = []
-    for order in orders:
-        parsed_order = {
-            'first_name': order.get('billing', {}).get('first_name', '') or
-                         order.get('shipping', {}).get('first_name', ''),
-            'last_name': order.get('billing', {}).get('last_name', '') or
-                        order.get('shipping', {}).get('last_name', ''),
-            'order_id': order.get('orderId', ''),
-            'snapp_pay_token': order.get('snappPayToken', ''),
-            'transaction_id': order.get('transactionId', '') or '',
-        }
-        parsed_orders.append(parsed_order)
+OUTPUT_FORMATS = ['csv', 'jsonl', 'json', 'txt', 'xlsx', 'html']
+
+# Multi-format export: orders handed to writer threads per queue item, and queued items per writer
+EXPORT_BATCH_SIZE = 500
+EXPORT_QUEUE_BATCHES = 8
 
-    print(f"✅ Parsed {len(parsed_orders)} orders")
-    return parsed_orders
+def new_summary():
+    """Empty summary counters for parsed orders (see add_to_summary)"""
+    return {'total': 0, 'with_tokens': 0, 'with_transaction_ids': 0, 'sample': None}
+
+def add_to_summary(summary, order):
+    """Count one parsed order into the summary"""
+    summary['total'] += 1
+    summary['with_tokens'] += 1 if order['snapp_pay_token'] else 0
+    summary['with_transaction_ids'] += 1 if order['transaction_id'] else 0
+    if summary['sample'] is None:
+        summary['sample'] = order
 
 def write_csv(output_file, orders):
     """Write orders to CSV file"""
-    if not orders:
-        print("⚠️  No orders to write")
-        return
+    with CsvSink(output_file, FIELDNAMES) as sink:
+        for order in orders:
+            sink.write(order)
 
-    fieldnames = ['first_name', 'last_name', 'order_id', 'snapp_pay_token', 'transaction_id']
+    return sink.count
 
-    with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(orders)
+def write_jsonl(output_file, orders):
+    """Write orders to JSON Lines file (one order per line)"""
+    with JsonLinesSink(output_file) as sink:
+        for order in orders:
+            sink.write(order)
 
-    print(f"✅ Written {len(orders)} orders to CSV: {output_file}")
+    return sink.count
 
 def write_json(output_file, orders):
-    """Write orders to JSON file"""
+    """Write orders to JSON file (same layout as json.dump with indent=2, written one order at a time)"""
+    count = 0
     with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(orders, f, ensure_ascii=False, indent=2)
+        f.write('[')
+        for order in orders:
+            order_json = json.dumps(order, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+            f.write((',\n  ' if count else '\n  ') + order_json)
+            count += 1
+        f.write('\n]' if count else ']')
 
-    print(f"✅ Written {len(orders)} orders to JSON: {output_file}")
+    return count
 
 def write_txt(output_file, orders):
     """Write orders to formatted text file"""
+    count = 0
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write("=" * 80 + "\n")
         f.write("WooCommerce SnappPay Orders - Parsed Data\n")
@@ -105,19 +121,37 @@ def write_txt(output_file, orders):
             f.write(f"  SnappPay Token: {order['snapp_pay_token']}\n")
             f.write(f"  Transaction ID: {order['transaction_id']}\n")
             f.write("-" * 80 + "\n\n")
+            count = i
+
+    return count
+
+def add_table_formatting(ws, cell_range, border_style):
+    """
+    Apply cell borders and alternate row colors to a data range via conditional formatting.
 
-    print(f"✅ Written {len(orders)} orders to text file: {output_file}")
+    Two shared rules cover the whole range, so rows can be streamed as plain values
+    instead of styling every cell.
+    """
+    stripe_fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
+    ws.conditional_formatting.add(cell_range, FormulaRule(formula=['MOD(ROW(),2)=0'], fill=stripe_fill,
+                                                          border=border_style))
+    ws.conditional_formatting.add(cell_range, FormulaRule(formula=['MOD(ROW(),2)=1'], border=border_style))
 
 def write_xlsx(output_file, orders):
-    """Write orders to Excel XLSX file with beautiful styling"""
+    """
+    Write orders to Excel XLSX file with beautiful styling
+
+    Uses a write-only workbook: rows are streamed to disk as plain values and
+    styled through shared conditional formatting, so large exports stay fast
+    with flat memory. orders may be any iterable of parsed orders.
+    """
     if not HAS_OPENPYXL:
         print("❌ Error: openpyxl library not installed")
         print("   Install it with: pip install openpyxl")
-        return False
+        return None
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "SnappPay Orders"
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("SnappPay Orders")
 
     # Define styles
     header_font = Font(bold=True, color="FFFFFF", size=12)
@@ -131,47 +165,50 @@ def write_xlsx(output_file, orders):
         bottom=Side(style='thin')
     )
 
+    # Column widths, frozen header row and header height must be set before rows are streamed
+    column_widths = [20, 20, 12, 40, 25]
+    for col_num, width in enumerate(column_widths, 1):
+        ws.column_dimensions[get_column_letter(col_num)].width = width
+    ws.freeze_panes = 'A2'
+    ws.row_dimensions[1].height = 30
+
     # Column headers
     headers = ['First Name', 'Last Name', 'Order ID', 'SnappPay Token', 'Transaction ID']
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num, value=header)
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
         cell.font = header_font
         cell.fill = header_fill
         cell.alignment = header_alignment
         cell.border = border_style
-
-    # Freeze header row
-    ws.freeze_panes = 'A2'
+        header_cells.append(cell)
+    ws.append(header_cells)
 
     # Write data
-    for row_num, order in enumerate(orders, 2):
-        ws.cell(row=row_num, column=1, value=order['first_name']).border = border_style
-        ws.cell(row=row_num, column=2, value=order['last_name']).border = border_style
-        ws.cell(row=row_num, column=3, value=order['order_id']).border = border_style
-        ws.cell(row=row_num, column=4, value=order['snapp_pay_token']).border = border_style
-        ws.cell(row=row_num, column=5, value=order['transaction_id'] or '').border = border_style
-
-        # Alternate row colors
-        if row_num % 2 == 0:
-            fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-            for col in range(1, 6):
-                ws.cell(row=row_num, column=col).fill = fill
-
-    # Auto-adjust column widths
-    column_widths = [20, 20, 12, 40, 25]
-    for col_num, width in enumerate(column_widths, 1):
-        ws.column_dimensions[get_column_letter(col_num)].width = width
+    row_count = 0
+    for order in orders:
+        ws.append([order['first_name'], order['last_name'], order['order_id'], order['snapp_pay_token'],
+                   order['transaction_id'] or ''])
+        row_count += 1
 
-    # Set row height for header
-    ws.row_dimensions[1].height = 30
+    # Borders and alternate row colors
+    if row_count:
+        add_table_formatting(ws, f"A2:{get_column_letter(len(headers))}{row_count + 1}", border_style)
 
     # Save file
     wb.save(output_file)
-    print(f"✅ Written {len(orders)} orders to Excel file: {output_file}")
+    return row_count
 
 def write_html(output_file, orders):
-    """Write orders to beautiful HTML file"""
-    html_content = f"""<!DOCTYPE html>
+    """
+    Write orders to beautiful HTML file
+
+    The page is streamed to disk: static markup first, then the orders as an
+    embedded JSON block that the browser renders one page at a time, so both
+    generation and the page itself stay fast for very large exports.
+    orders may be any iterable of parsed orders.
+    """
+    html_head = f"""<!DOCTYPE html>
 <html lang="fa" dir="rtl">
 <head>
     <meta charset="UTF-8">
@@ -308,7 +345,85 @@ def write_html(output_file, orders):
             border-top: 2px solid #e9ecef;
             background: #f8f9fa;
         }}
+
+        .pagination {{
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            gap: 15px;
+            padding: 0 20px 20px;
+            color: #495057;
+            font-size: 14px;
+        }}
+
+        .btn-page {{
+            background: #f8f9fa;
+            border: 1px solid #e9ecef;
+            border-radius: 6px;
+            padding: 8px 16px;
+            cursor: pointer;
+            font-size: 13px;
+        }}
+
+        .btn-page:hover {{
+            background: #e7f3ff;
+        }}
     </style>
+    <script>
+        // Orders data is embedded as JSON at the end of the page and rendered one page at a time
+        let ORDERS_DATA = [];
+        let currentPage = 1;
+        let pageSize = 100;
+
+        function escapeHtml(value) {{
+            return String(value ?? '').replace(/[&<>"']/g, c => ({{
+                '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+            }})[c]);
+        }}
+
+        function renderRow(order) {{
+            return `
+                    <tr>
+                        <td>${{escapeHtml(order.first_name)}}</td>
+                        <td>${{escapeHtml(order.last_name)}}</td>
+                        <td class="order-id">${{escapeHtml(order.order_id)}}</td>
+                        <td class="token">${{escapeHtml(order.snapp_pay_token)}}</td>
+                        <td class="transaction-id">${{escapeHtml(order.transaction_id)}}</td>
+                    </tr>`;
+        }}
+
+        // Render only the rows of the current page
+        function renderPage() {{
+            const pageCount = Math.max(1, Math.ceil(ORDERS_DATA.length / pageSize));
+            currentPage = Math.min(Math.max(currentPage, 1), pageCount);
+            const start = (currentPage - 1) * pageSize;
+            document.getElementById('orders-body').innerHTML =
+                ORDERS_DATA.slice(start, start + pageSize).map(renderRow).join('');
+            document.getElementById('page-info').textContent =
+                `صفحه ${{currentPage}} از ${{pageCount}} (${{ORDERS_DATA.length}} سفارش)`;
+        }}
+
+        function goToPage(page) {{
+            currentPage = page;
+            renderPage();
+        }}
+
+        function setPageSize(size) {{
+            const firstIndex = (currentPage - 1) * pageSize;
+            pageSize = parseInt(size, 10);
+            currentPage = Math.floor(firstIndex / pageSize) + 1;
+            renderPage();
+        }}
+
+        // Initialize on page load: parse the embedded data, fill in the stats and render the first page
+        document.addEventListener('DOMContentLoaded', function() {{
+            ORDERS_DATA = JSON.parse(document.getElementById('orders-data').textContent);
+            document.getElementById('stat-total').textContent = ORDERS_DATA.length;
+            document.getElementById('stat-tokens').textContent = ORDERS_DATA.filter(o => o.snapp_pay_token).length;
+            document.getElementById('stat-transactions').textContent = ORDERS_DATA.filter(o => o.transaction_id).length;
+            renderPage();
+        }});
+    </script>
 </head>
 <body>
     <div class="container">
@@ -319,15 +434,15 @@ def write_html(output_file, orders):
 
         <div class="stats">
             <div class="stat-item">
-                <div class="stat-value">{len(orders)}</div>
+                <div class="stat-value" id="stat-total">0</div>
                 <div class="stat-label">Total Orders</div>
             </div>
             <div class="stat-item">
-                <div class="stat-value">{sum(1 for o in orders if o['snapp_pay_token'])}</div>
+                <div class="stat-value" id="stat-tokens">0</div>
                 <div class="stat-label">With Tokens</div>
             </div>
             <div class="stat-item">
-                <div class="stat-value">{sum(1 for o in orders if o['transaction_id'])}</div>
+                <div class="stat-value" id="stat-transactions">0</div>
                 <div class="stat-label">With Transaction IDs</div>
             </div>
         </div>
@@ -343,104 +458,256 @@ def write_html(output_file, orders):
                         <th>Transaction ID</th>
                     </tr>
                 </thead>
-                <tbody>
-"""
-
-    for order in orders:
-        html_content += f"""
-                    <tr>
-                        <td>{order['first_name']}</td>
-                        <td>{order['last_name']}</td>
-                        <td class="order-id">{order['order_id']}</td>
-                        <td class="token">{order['snapp_pay_token']}</td>
-                        <td class="transaction-id">{order['transaction_id'] or ''}</td>
-                    </tr>
-"""
-
-    html_content += """
+                <tbody id="orders-body">
                 </tbody>
             </table>
         </div>
 
+        <div class="pagination">
+            <button class="btn-page" onclick="goToPage(currentPage - 1)">قبلی</button>
+            <span id="page-info"></span>
+            <button class="btn-page" onclick="goToPage(currentPage + 1)">بعدی</button>
+            <select onchange="setPageSize(this.value)">
+                <option value="50">50</option>
+                <option value="100" selected>100</option>
+                <option value="250">250</option>
+                <option value="500">500</option>
+            </select>
+        </div>
+
         <div class="footer">
             <p>SnappPay Orders Data - Infinity Store</p>
         </div>
     </div>
-</body>
-</html>
 """
 
+    count = 0
     with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+        f.write(html_head)
+        f.write('    <script type="application/json" id="orders-data">[')
+        for order in orders:
+            f.write((',\n' if count else '\n') + embed_json(order))
+            count += 1
+        f.write('\n]</script>\n</body>\n</html>\n')
+
+    return count
+
+# Writers take (output_file, orders) and return the number of orders written (None if the format is unavailable)
+WRITERS = {
+    'csv': write_csv,
+    'jsonl': write_jsonl,
+    'json': write_json,
+    'txt': write_txt,
+    'xlsx': write_xlsx,
+    'html': write_html,
+}
+
+FORMAT_LABELS = {
+    'csv': 'CSV',
+    'jsonl': 'JSON Lines',
+    'json': 'JSON',
+    'txt': 'text file',
+    'xlsx': 'Excel file',
+    'html': 'HTML file',
+}
+
+def parse_formats(value):
+    """
+    Parse the output format argument: one format, a comma-separated list, or 'all'.
 
-    print(f"✅ Written {len(orders)} orders to HTML file: {output_file}")
+    Invalid formats are skipped with a warning; falls back to xlsx if none are left.
+    """
+    if value.lower() == 'all':
+        return list(OUTPUT_FORMATS)
+
+    formats = []
+    for output_format in value.lower().split(','):
+        output_format = output_format.strip()
+        if output_format not in OUTPUT_FORMATS:
+            print(f"⚠️  Invalid output format '{output_format}', skipping")
+        elif output_format not in formats:
+            formats.append(output_format)
+
+    if not formats:
+        print("⚠️  No valid output format, using 'xlsx'")
+        formats = ['xlsx']
+    return formats
+
+def iter_queue(order_queue):
+    """Yield orders from the batches put on a queue until the None sentinel"""
+    while True:
+        batch = order_queue.get()
+        if batch is None:
+            return
+        yield from batch
+
+def run_writer(writer, output_file, order_queue):
+    """Run one writer on queued orders, always draining the queue so the parser never blocks on it"""
+    orders = iter_queue(order_queue)
+    try:
+        return writer(output_file, orders)
+    finally:
+        for _ in orders:
+            pass
+
+def write_formats_concurrently(formats, output_files, orders, written):
+    """
+    Fan orders out to one writer thread per format (see export_orders)
+
+    Fills written with the result of each writer that finished; a failed writer is
+    reported and left out. Errors from reading the orders are raised after every
+    writer has stopped.
+    """
+    queues = {output_format: queue.Queue(maxsize=EXPORT_QUEUE_BATCHES) for output_format in formats}
+    with ThreadPoolExecutor(max_workers=len(formats)) as executor:
+        futures = {
+            output_format: executor.submit(run_writer, WRITERS[output_format], output_files[output_format],
+                                           queues[output_format])
+            for output_format in formats
+        }
+
+        try:
+            batch = []
+            for order in orders:
+                batch.append(order)
+                if len(batch) >= EXPORT_BATCH_SIZE:
+                    for order_queue in queues.values():
+                        order_queue.put(batch)
+                    batch = []
+            if batch:
+                for order_queue in queues.values():
+                    order_queue.put(batch)
+        finally:
+            for order_queue in queues.values():
+                order_queue.put(None)
+
+        for output_format, future in futures.items():
+            try:
+                written[output_format] = future.result()
+            except Exception as e:
+                print(f"❌ Error writing {output_format.upper()} file: {e}")
+
+def export_orders(input_file, output_dir, formats):
+    """
+    Parse the input once and write every requested format.
+
+    With several formats, parsed orders are fanned out in batches to one writer
+    thread per format through bounded queues, so the input is read a single time
+    and memory stays flat. Output files are snapppay-orders-parsed.<format> in
+    output_dir. Each format is written to <file>.tmp and only replaces the output
+    file once the whole input parsed, so a truncated or malformed input never
+    overwrites a previous export. Nothing is written when the input has no orders.
+
+    Returns:
+        Summary dictionary (see new_summary)
+    """
+    summary = new_summary()
+    output_files = {output_format: output_dir / f"snapppay-orders-parsed.{output_format}" for output_format in formats}
+    tmp_files = {output_format: path.with_name(path.name + '.tmp') for output_format, path in output_files.items()}
+    written = {}
+
+    try:
+        orders = iter_parsed_orders(input_file)
+        first_order = next(orders, None)
+        if first_order is None:
+            return summary
+
+        def counted_orders():
+            for order in chain([first_order], orders):
+                add_to_summary(summary, order)
+                yield order
+
+        if len(formats) == 1:
+            written[formats[0]] = WRITERS[formats[0]](tmp_files[formats[0]], counted_orders())
+        else:
+            write_formats_concurrently(formats, tmp_files, counted_orders(), written)
+
+        # The whole input parsed: move the finished files into place
+        for output_format, count in written.items():
+            if count is None:
+                continue
+            os.replace(tmp_files[output_format], output_files[output_format])
+            print(f"✅ Written {count} orders to {FORMAT_LABELS[output_format]}: {output_files[output_format]}")
+
+    except FileNotFoundError:
+        print(f"❌ Error: File not found: {input_file}")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"❌ Error: Invalid JSON file: {e}")
+        sys.exit(1)
+    finally:
+        # Drop partial files left by a parse error, a failed writer or an interrupt
+        for tmp_file in tmp_files.values():
+            tmp_file.unlink(missing_ok=True)
+
+    return summary
 
 def main():
     # Determine input file path
     script_dir = Path(__file__).parent
     default_input = script_dir / 'woocommerce-guest-orders-snapppay-data.json'
 
+    # Output directory: --output-dir DIR (default: next to the input file)
+    args = sys.argv[1:]
+    output_dir = None
+    for idx, arg in enumerate(args):
+        if arg == '--output-dir' and idx + 1 < len(args):
+            output_dir = Path(args[idx + 1])
+            del args[idx:idx + 2]
+            break
+        if arg.startswith('--output-dir='):
+            output_dir = Path(arg.split('=', 1)[1])
+            del args[idx]
+            break
+
     # Get input file from command line or use default
-    if len(sys.argv) > 1:
-        input_file = Path(sys.argv[1])
+    if args:
+        input_file = Path(args[0])
     else:
         input_file = default_input
 
     # Check if file exists
     if not input_file.exists():
         print(f"❌ Error: Input file not found: {input_file}")
-        print(f"   Usage: python {Path(__file__).name} [input_file.json]")
+        print(f"   Usage: python {Path(__file__).name} [input_file.json|input_file.jsonl] [format[,format...]|all] "
+              f"[--output-dir DIR]")
         sys.exit(1)
 
-    # Determine output format (default: xlsx)
-    output_format = 'xlsx'
-    if len(sys.argv) > 2:
-        output_format = sys.argv[2].lower()
-        if output_format not in ['csv', 'json', 'txt', 'xlsx', 'html']:
-            print(f"⚠️  Invalid output format '{output_format}', using 'xlsx'")
-            output_format = 'xlsx'
+    # Determine output formats (default: xlsx), e.g. csv,xlsx,html,json or all
+    formats = parse_formats(args[1]) if len(args) > 1 else ['xlsx']
+
+    if output_dir is None:
+        output_dir = input_file.parent
+    output_dir.mkdir(parents=True, exist_ok=True)
 
     print("🚀 Starting SnappPay Orders Parser")
     print("=" * 60)
     print(f"📂 Input file: {input_file}")
-    print(f"📝 Output format: {output_format.upper()}")
+    print(f"📝 Output format: {', '.join(output_format.upper() for output_format in formats)}")
+    print(f"📁 Output directory: {output_dir}")
     print()
 
-    # Parse orders
-    orders = parse_orders(input_file)
+    # Parse once and write every format
+    summary = export_orders(input_file, output_dir, formats)
 
-    if not orders:
+    if not summary['total']:
         print("⚠️  No orders found to process")
         sys.exit(0)
 
-    # Generate output filename
-    output_file = input_file.parent / f"snapppay-orders-parsed.{output_format}"
-
-    # Write output based on format
-    if output_format == 'csv':
-        write_csv(output_file, orders)
-    elif output_format == 'json':
-        write_json(output_file, orders)
-    elif output_format == 'txt':
-        write_txt(output_file, orders)
-    elif output_format == 'xlsx':
-        write_xlsx(output_file, orders)
-    elif output_format == 'html':
-        write_html(output_file, orders)
-
     # Print summary
     print()
     print("📊 Summary:")
-    print(f"   Total orders: {len(orders)}")
-    print(f"   Orders with tokens: {sum(1 for o in orders if o['snapp_pay_token'])}")
-    print(f"   Orders with transaction IDs: {sum(1 for o in orders if o['transaction_id'])}")
-    print(f"   Output file: {output_file}")
+    print(f"   Total orders: {summary['total']}")
+    print(f"   Orders with tokens: {summary['with_tokens']}")
+    print(f"   Orders with transaction IDs: {summary['with_transaction_ids']}")
+    for output_format in formats:
+        print(f"   Output file: {output_dir / f'snapppay-orders-parsed.{output_format}'}")
 
     # Print sample
-    if orders:
+    if summary['sample']:
         print()
         print("📋 Sample output (first order):")
-        sample = orders[0]
+        sample = summary['sample']
         print(f"   First Name: {sample['first_name']}")
         print(f"   Last Name: {sample['last_name']}")
         print(f"   Order ID: {sample['order_id']}")